@@ -0,0 +1,83 @@
+import fnmatch, io, os, tarfile
+
+from .foxdb import parse_log_line
+
+# Substrings FoxTelem uses in telemetry log names for each layout, e.g. FOX4rttelemetry.log
+LAYOUT_FILE_TAGS = {
+    'REAL_TIME': 'rttelemetry',
+    'MAX':       'maxtelemetry',
+    'MIN':       'mintelemetry',
+    'RAD':       'radtelemetry',
+}
+
+"""
+Stream a FOXDB.tar.gz/serverlogs.tar.gz archive member by member without
+extracting it.  source is a path, a binary file object or a streaming HTTP
+response (see AmsatApiClient.open_telemetry_archive).  The archive is read
+strictly sequentially, so nothing is ever written to disk.
+
+names - optional shell patterns matched against member paths or basenames
+layouts - optional layout names (REAL_TIME, MAX, MIN, RAD, ...) keeping only
+    the telemetry logs of those layouts
+
+Yields (TarInfo, file object) for every matching regular file; each file
+object is only valid until the next member is requested.
+"""
+def iter_archive_members(source, names=None, layouts=None):
+    fileobj, close = _open_source(source)
+
+    try:
+        with tarfile.open(fileobj=fileobj, mode='r|gz') as archive:
+            for member in archive:
+                if not member.isfile() or not _wanted(member.name, names, layouts):
+                    continue
+
+                yield member, archive.extractfile(member)
+    finally:
+        if close:
+            fileobj.close()
+
+"""
+Yield (member name, LogRecord) for every telemetry log line in the matching
+members, decoded on the fly.  Lines that do not parse are skipped.
+"""
+def iter_archive_records(source, names=None, layouts=None):
+    if names is None and layouts is None:
+        names = ['*.log']
+
+    for member, fp in iter_archive_members(source, names=names, layouts=layouts):
+        for line in io.BufferedReader(fp, buffer_size=256 * 1024):
+            if not line.strip():
+                continue
+
+            try:
+                yield member.name, parse_log_line(line)
+            except ValueError:
+                continue
+
+def _open_source(source):
+    if isinstance(source, (str, bytes, os.PathLike)):
+        return open(source, 'rb'), True
+
+    # requests.Response opened with stream=True
+    raw = getattr(source, 'raw', None)
+
+    if raw is not None:
+        raw.decode_content = True
+        return raw, False
+
+    return source, False
+
+def _wanted(name, names, layouts):
+    basename = os.path.basename(name)
+
+    if names is not None and not any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(basename, pattern) for pattern in names):
+        return False
+
+    if layouts is not None:
+        tags = [LAYOUT_FILE_TAGS.get(layout.upper(), layout.lower()) for layout in layouts]
+
+        if not any(tag in basename.lower() for tag in tags):
+            return False
+
+    return True
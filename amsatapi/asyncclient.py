@@ -0,0 +1,112 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .client import AmsatApiClient
+
+"""
+The AsyncAmsatApiClient object exposes the AmsatApiClient methods as
+coroutines so many status/passes queries can be in flight at once.
+
+Requests run on a bounded thread pool against one pooled AmsatApiClient
+session, so fan-out queries reuse keep-alive connections.  Constructor
+keyword arguments not listed here are passed through to AmsatApiClient.
+concurrency - maximum number of requests in flight at any time
+"""
+class AsyncAmsatApiClient:
+
+    def __init__(self, concurrency=16, client=None, **client_kwargs):
+        self.concurrency = concurrency
+
+        if client is None:
+            client_kwargs.setdefault('pool_maxsize', concurrency)
+            client = AmsatApiClient(**client_kwargs)
+
+        self.client    = client
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    # Waits for in-flight requests off the event loop before closing the session
+    async def close(self):
+        loop = asyncio.get_running_loop()
+
+        await loop.run_in_executor(None, self._executor.shutdown)
+        self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def stats(self):
+        return self.client.stats
+
+    async def get_tle(self):
+        return await self._run(lambda: self.client.tle)
+
+    async def fetch_tle_file(self):
+        return await self._run(self.client.fetch_tle_file)
+
+    async def fetch_tle_dict(self):
+        return await self._run(self.client.fetch_tle_dict)
+
+    async def get_sat_status(self, sat_name, hours=96):
+        return await self._run(self.client.get_sat_status, sat_name, hours=hours)
+
+    async def get_sat_passes(self, location, sat_name):
+        return await self._run(self.client.get_sat_passes, location, sat_name)
+
+    async def download_telemetry_database(self, sat_name, output_filename="FOXDB.tar.gz"):
+        return await self._run(self.client.download_telemetry_database, sat_name, output_filename=output_filename)
+
+    async def download_telemetry_serverlogs(self, sat_name, output_filename="serverlogs.tar.gz"):
+        return await self._run(self.client.download_telemetry_serverlogs, sat_name, output_filename=output_filename)
+
+    """
+    Run one coroutine per (key, factory) pair with at most `concurrency`
+    running at once, yielding (key, result) tuples in completion order.  With
+    return_exceptions=True a failed request yields its exception as the
+    result instead of aborting the iteration.
+    """
+    async def _fan_out(self, jobs, concurrency=None, return_exceptions=False):
+        semaphore = asyncio.Semaphore(concurrency if concurrency is not None else self.concurrency)
+
+        async def run(key, factory):
+            async with semaphore:
+                try:
+                    return key, await factory()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    return key, e
+
+        tasks = [asyncio.ensure_future(run(key, factory)) for key, factory in jobs]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # Yields (sat_name, reports) as each status query completes
+    def get_many_statuses(self, names, hours=96, concurrency=None, return_exceptions=False):
+        jobs = [(name, partial(self.get_sat_status, name, hours=hours)) for name in names]
+
+        return self._fan_out(jobs, concurrency=concurrency, return_exceptions=return_exceptions)
+
+    # Yields ((location, sat_name), passes) as each passes query completes
+    def get_passes_matrix(self, locations, sats, concurrency=None, return_exceptions=False):
+        jobs = [
+            ((location, sat_name), partial(self.get_sat_passes, location, sat_name))
+            for location in locations
+            for sat_name in sats
+        ]
+
+        return self._fan_out(jobs, concurrency=concurrency, return_exceptions=return_exceptions)
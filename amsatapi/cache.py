@@ -0,0 +1,105 @@
+import json, os, tempfile
+from contextlib import contextmanager
+from time import time
+
+"""
+Open a binary file that replaces path atomically: writes go to a temporary
+file in the same directory which is renamed over the destination when the
+block exits cleanly, so concurrent readers only ever see the old or the new
+file, never a partial one.  On error the temporary file is removed.
+"""
+@contextmanager
+def atomic_output(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".{}.".format(os.path.basename(path)), suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            yield fp
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def atomic_write(path, data):
+    with atomic_output(path) as fp:
+        fp.write(data)
+
+"""
+On-disk cache for the AMSAT TLE file, shareable between processes.
+
+The file body is stored next to a small JSON metadata file holding the
+fetch time, size and the ETag/Last-Modified validators sent by the server.
+Entries younger than ttl seconds are served without touching the network;
+older entries are revalidated with a conditional GET.
+"""
+class TleFileCache:
+
+    def __init__(self, cache_dir, ttl=3600, filename="nasabare.txt"):
+        self.cache_dir = cache_dir
+        self.ttl       = ttl
+        self.data_path = os.path.join(cache_dir, filename)
+        self.meta_path = self.data_path + ".json"
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def load(self):
+        try:
+            with open(self.meta_path, 'r') as fp:
+                meta = json.load(fp)
+            with open(self.data_path, 'rb') as fp:
+                content = fp.read()
+        except (OSError, ValueError):
+            return None, None
+
+        # Data and metadata are replaced separately, discard mismatched pairs
+        if len(content) != meta.get('size'):
+            return None, None
+
+        return content.decode('utf-8'), meta
+
+    def is_fresh(self, meta):
+        return meta is not None and time() - meta.get('fetched_at', 0) < self.ttl
+
+    def validators(self, meta):
+        headers = {}
+
+        if meta is None:
+            return headers
+
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        return headers
+
+    def store(self, content, headers):
+        meta = {
+            'fetched_at':    time(),
+            'size':          len(content),
+            'etag':          headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+
+        atomic_write(self.data_path, content)
+        self._write_meta(meta)
+
+        return meta
+
+    # Server answered 304 Not Modified, restart the TTL on the cached copy
+    def touch(self, meta):
+        meta = dict(meta, fetched_at=time())
+        self._write_meta(meta)
+
+        return meta
+
+    def clear(self):
+        for path in (self.meta_path, self.data_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _write_meta(self, meta):
+        atomic_write(self.meta_path, json.dumps(meta).encode('utf-8'))
@@ -0,0 +1,231 @@
+import json, sys
+from argparse import ArgumentParser
+
+from .client import AmsatApiClient
+from .instrument import MetricsCollector
+from .telemetry import TELEMETRY_ARCHIVES, TELEMETRY_SERVER_DIRS
+
+# pprint drags in dataclasses and inspect; only import it once output is due
+def pprint(*args, **kwargs):
+    from pprint import pprint
+
+    pprint(*args, **kwargs)
+
+"""
+Download progress callback for the command-line utility.  Redraws a single
+status line on stderr with bytes transferred, percentage and throughput,
+limited to one redraw per interval seconds.
+"""
+class DownloadProgress:
+
+    def __init__(self, label, stream=None, interval=0.5):
+        self.label    = label
+        self.stream   = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self._last    = None
+
+    def __call__(self, done, total, elapsed):
+        if self._last is not None and elapsed - self._last < self.interval and done != total:
+            return
+
+        self._last = elapsed
+        self.stream.write("\r" + self.format(done, total, elapsed))
+        self.stream.flush()
+
+    def format(self, done, total, elapsed):
+        rate = done / elapsed if elapsed > 0 else 0.0
+        line = "{}: {:.1f} MB".format(self.label, done / 1e6)
+
+        if total:
+            line += " / {:.1f} MB ({:.0f}%)".format(total / 1e6, 100.0 * done / total)
+
+        return line + " {:.2f} MB/s".format(rate / 1e6)
+
+    def finish(self):
+        if self._last is not None:
+            self.stream.write("\n")
+            self.stream.flush()
+
+def parse_args():
+    ap = ArgumentParser()
+
+    ap.add_argument('--base-url', default="https://amsat.org", help="Alternate base URL (mirror or local stand-in server)")
+    ap.add_argument('--timeout', type=float, default=30, help="Request timeout in seconds")
+    ap.add_argument('--retries', type=int, default=3, help="Retries for connection errors and 5xx responses")
+    ap.add_argument('--cache-dir', help="Directory for the shared on-disk TLE cache (disabled if omitted)")
+    ap.add_argument('--tle-ttl', type=float, default=3600, help="Seconds before a cached TLE file is revalidated")
+    ap.add_argument('--response-cache', help="SQLite file caching status/passes responses between runs (disabled if omitted)")
+    ap.add_argument('--stats', action="store_true", help="Print per-endpoint latency/attempt counters to stderr on exit")
+    ap.add_argument('--profile', action="store_true", help="Print per-span latency histograms (HTTP, cache, parsing) to stderr on exit")
+    ap.add_argument('--metrics', help="Write metrics in the Prometheus text format to this file on exit")
+
+    subparsers = ap.add_subparsers(dest='operation')
+
+    status_p = subparsers.add_parser('status')
+
+    status_p.add_argument('-n', '--name', required=True, help="The name of the satellite must match the string shown on amsat.org/status , i.e AO-91 works, but AO-92 does not ... use AO-92_L/v or AO-92_U/v instead.")
+    status_p.add_argument('--hours', default=96, help="The hours parameter is optional, if you omit it you will get the last 96 hours of reports.") # Unable to use -h because of conflict with help arg.
+    status_p.add_argument('--store', help="SQLite status store: fetch only reports newer than those stored, then answer from local history")
+
+    watch_p = subparsers.add_parser('watch', help="Poll satellites continuously, printing new status reports as NDJSON")
+
+    watch_p.add_argument('-n', '--name', action="append", required=True, help="Satellite name as for status, may be repeated")
+    watch_p.add_argument('--min-interval', type=float, default=60, help="Seconds between polls of a satellite with new reports")
+    watch_p.add_argument('--max-interval', type=float, default=900, help="Upper bound on the seconds between polls of a quiet satellite")
+    watch_p.add_argument('--backoff', type=float, default=2.0, help="Interval multiplier after each poll without new reports")
+    watch_p.add_argument('--concurrency', type=int, default=4, help="Satellites polled in parallel")
+    watch_p.add_argument('--store', help="SQLite status store, so a restarted watch does not repeat reports")
+    watch_p.add_argument('--skip-initial', action="store_true", help="Don't print the reports returned by the first poll of each satellite")
+
+    passes_p = subparsers.add_parser('passes')
+
+    passes_p.add_argument('-l', '--location', help="Select a name from the list returned from above and use a Maidenhead grid square to specify the location.")
+    passes_p.add_argument('-o', '--object', help="Sames as 'name' in status operation.")
+    passes_p.add_argument('--offline', action="store_true", help="Predict locally from the AMSAT TLEs instead of querying passes.php (requires numpy and sgp4)")
+    passes_p.add_argument('--hours', type=float, default=24, help="Prediction window for --offline")
+
+    download_db_p = subparsers.add_parser('download-telemetry-database')
+
+    download_db_p.add_argument('-n', '--name', required=True, help="Sat Name as in 'fox1d' for /tlm/fox1d/FOXDB.tar.gz")
+    download_db_p.add_argument('-o', '--output', default="FOXDB.tar.gz", help="Output Filename")
+
+    download_sl_p = subparsers.add_parser('download-telemetry-serverlogs')
+
+    download_sl_p.add_argument('-n', '--name', required=True, help="Sat Name as in 'fox1d' for /tlm/fox1d/FOXDB.tar.gz")
+    download_sl_p.add_argument('-o', '--output', default="serverlogs.tar.gz", help="Output Filename")
+
+    sync_p = subparsers.add_parser('sync-telemetry')
+
+    sync_p.add_argument('-n', '--name', required=True, action='append', help="Sat Name as in 'fox1d', may be repeated")
+    sync_p.add_argument('-d', '--output-dir', default=".", help="Mirror directory, archives are stored under <dir>/<name>/")
+    sync_p.add_argument('-a', '--archive', action='append', choices=TELEMETRY_ARCHIVES, help="Archive to sync, may be repeated (Default: all)")
+
+    bulk_p = subparsers.add_parser('download-telemetry')
+
+    bulk_p.add_argument('-n', '--name', action='append', help="Sat Name as in 'fox1d', may be repeated (Default: all Fox server dirs)")
+    bulk_p.add_argument('-d', '--output-dir', default=".", help="Mirror directory, archives are stored under <dir>/<name>/")
+    bulk_p.add_argument('-a', '--archive', action='append', choices=TELEMETRY_ARCHIVES, help="Archive to download, may be repeated (Default: all)")
+    bulk_p.add_argument('-w', '--workers', type=int, default=4, help="Concurrent downloads")
+    bulk_p.add_argument('--per-host', type=int, default=2, help="Maximum concurrent connections to one host")
+    bulk_p.add_argument('--max-rate', type=float, help="Aggregate bandwidth cap in MB/s")
+    bulk_p.add_argument('--checksum', action='append', default=[], metavar="NAME/ARCHIVE=SHA256", help="Expected SHA-256 for an archive, may be repeated")
+    bulk_p.add_argument('--no-verify', action='store_true', help="Skip gzip integrity and checksum verification")
+
+    tle_p = subparsers.add_parser('tle')
+
+    tle_p.add_argument('-n', '--name', help="Satellite Name from TLE Line 0")
+    tle_p.add_argument('--norad-id', type=int, help="Satellite NORAD Catalog Number")
+    tle_p.add_argument('-o', '--output', help="Output Filename (Default Prints to stdout)")
+
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+
+    metrics = MetricsCollector().attach() if args.profile or args.metrics is not None else None
+
+    response_cache = None
+
+    if args.response_cache:
+        from .responsecache import ResponseCache, SqliteCacheBackend
+
+        response_cache = ResponseCache(SqliteCacheBackend(args.response_cache))
+
+    amsat = AmsatApiClient(base_url=args.base_url, timeout=args.timeout, retries=args.retries,
+                           cache_dir=args.cache_dir, tle_ttl=args.tle_ttl, response_cache=response_cache)
+
+    if args.operation == 'status':
+        if args.store is not None:
+            from .statusstore import StatusStore
+
+            store = StatusStore(amsat, args.store)
+            store.update_status(args.name)
+            pprint(store.reports(args.name, hours=float(args.hours)))
+        else:
+            pprint(amsat.get_sat_status(args.name, hours=args.hours))
+    elif args.operation == "watch":
+        from .watch import StatusWatcher
+
+        watcher = StatusWatcher(
+            amsat, args.name,
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            backoff=args.backoff,
+            store=args.store,
+            concurrency=args.concurrency,
+            skip_initial=args.skip_initial,
+            on_error=lambda name, error: print("{}: {}".format(name, error), file=sys.stderr)
+        )
+
+        try:
+            for sat_name, report in watcher.watch():
+                sys.stdout.write(json.dumps(dict(report, satellite=sat_name)) + "\n")
+                sys.stdout.flush()
+        except KeyboardInterrupt:
+            pass
+    elif args.operation == "passes":
+        if args.offline:
+            pprint(amsat.pass_predictor().get_sat_passes(args.location, args.object, hours=args.hours))
+        else:
+            pprint(amsat.get_sat_passes(args.location, args.object))
+    elif args.operation == "download-telemetry-database":
+        progress = DownloadProgress(args.output)
+        amsat.download_telemetry_database(args.name, output_filename=args.output, progress=progress)
+        progress.finish()
+    elif args.operation == "download-telemetry-serverlogs":
+        progress = DownloadProgress(args.output)
+        amsat.download_telemetry_serverlogs(args.name, output_filename=args.output, progress=progress)
+        progress.finish()
+    elif args.operation == "sync-telemetry":
+        archives = args.archive if args.archive is not None else TELEMETRY_ARCHIVES
+
+        for name in args.name:
+            for archive in archives:
+                progress = DownloadProgress("{}/{}".format(name, archive))
+                result = amsat.sync_telemetry(name, args.output_dir, archives=[archive], progress=progress)[0]
+                progress.finish()
+                print("{name}/{archive}: {action} ({transferred} bytes transferred)".format(**result))
+    elif args.operation == "download-telemetry":
+        from .telemetry import TelemetryDownloadScheduler
+
+        scheduler = TelemetryDownloadScheduler(
+            amsat, args.output_dir,
+            workers=args.workers,
+            per_host=args.per_host,
+            max_rate=args.max_rate * 1e6 if args.max_rate is not None else None,
+            verify=not args.no_verify,
+            checksums=dict(checksum.split('=', 1) for checksum in args.checksum)
+        )
+        report = scheduler.run(
+            sat_names=args.name if args.name is not None else TELEMETRY_SERVER_DIRS,
+            archives=args.archive if args.archive is not None else TELEMETRY_ARCHIVES
+        )
+
+        for result in report['results']:
+            print("{}/{}: {} ({} bytes, {:.1f}s){}".format(
+                result['name'], result['archive'], result['action'], result['transferred'], result['seconds'],
+                " " + result['error'] if 'error' in result else ""))
+
+        print("Total: {:.1f} MB in {:.1f}s ({:.2f} MB/s), {} failed".format(
+            report['transferred'] / 1e6, report['seconds'], report['throughput'] / 1e6, report['failed']))
+    elif args.operation == "tle":
+        if args.name is not None or args.norad_id is not None:
+            record = amsat.tle_store.get_by_name(args.name) if args.name is not None else amsat.tle_store.get_by_norad_id(args.norad_id)
+            print(record.name)
+            print("\n".join(record.lines))
+        else:
+            print(amsat.fetch_tle_file())
+    else:
+        print("Invalid Operation")
+
+    if args.stats:
+        pprint(amsat.stats.to_dict(), stream=sys.stderr)
+
+        if amsat.response_cache is not None:
+            pprint(amsat.response_cache.stats(), stream=sys.stderr)
+
+    if args.profile:
+        print(metrics.report(), file=sys.stderr)
+
+    if args.metrics is not None:
+        metrics.write_textfile(args.metrics)
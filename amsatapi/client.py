@@ -0,0 +1,453 @@
+import os
+from time import monotonic
+
+from .cache import TleFileCache, atomic_output
+from .instrument import default_instrumentation
+from .tle import TleStore
+
+"""
+Per-endpoint request counters kept by AmsatApiClient.  Each entry tracks the
+number of calls, the number of HTTP attempts made (including retries) and the
+accumulated/last wall time of the calls.
+"""
+class RequestStats:
+
+    def __init__(self):
+        self.endpoints = {}
+
+    def record(self, endpoint, elapsed, attempts):
+        entry = self.endpoints.setdefault(endpoint, {
+            'calls':         0,
+            'attempts':      0,
+            'total_seconds': 0.0,
+            'last_seconds':  0.0,
+        })
+
+        entry['calls']         += 1
+        entry['attempts']      += attempts
+        entry['total_seconds'] += elapsed
+        entry['last_seconds']   = elapsed
+
+    def reset(self):
+        self.endpoints = {}
+
+    def to_dict(self):
+        return {
+            endpoint: dict(entry, mean_seconds=entry['total_seconds'] / entry['calls'])
+            for endpoint, entry in self.endpoints.items()
+        }
+
+"""
+The AmsatApiClient object provides a thin interface to the resources on the 
+amsat.org site and API.
+
+All requests share one pooled requests.Session so repeated calls reuse
+keep-alive connections instead of paying a new TCP+TLS handshake each time.
+pool_maxsize - connections kept open per host
+timeout - seconds, or a (connect, read) tuple, applied to every request
+retries / backoff_factor - urllib3 retry policy for connection errors and 5xx
+base_url - override to point the client at a mirror or local stand-in server
+cache_dir / tle_ttl - keep the TLE file in an on-disk cache shared between
+    processes, revalidating it with a conditional GET once tle_ttl seconds old
+response_cache - optional ResponseCache serving repeated get_sat_status and
+    get_sat_passes calls with the same arguments until their TTL expires
+instrumentation - Instrumentation receiving timing spans and counters,
+    default_instrumentation unless given
+"""
+class AmsatApiClient:
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, base_url="https://amsat.org", pool_connections=4, pool_maxsize=16,
+                 timeout=(5, 30), retries=3, backoff_factor=0.5, session=None,
+                 cache_dir=None, tle_ttl=3600, response_cache=None, instrumentation=None):
+        self.base_url = base_url.rstrip("/")
+        self.status_url = self.base_url + "/status/api/v1/sat_info.php"
+        self.tle_url    = self.base_url + "/tle/current/nasabare.txt"
+        self.track_url  = self.base_url + "/track/api/v1/passes.php"
+
+        self.timeout = timeout
+        self.stats   = RequestStats()
+
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation
+
+        # The session (and requests itself) is only set up on first use, so
+        # clients answered entirely from the TLE cache never import requests
+        self._session      = session
+        self._pool_options = (pool_connections, pool_maxsize, retries, backoff_factor)
+
+        self.tle_cache = TleFileCache(cache_dir, ttl=tle_ttl) if cache_dir is not None else None
+        self.response_cache = response_cache
+
+        self._tle      = None
+        self._tle_dict = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = self._create_session(*self._pool_options)
+
+        return self._session
+
+    def _create_session(self, pool_connections, pool_maxsize, retries, backoff_factor):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    """
+    Issue a request through the pooled session, recording latency and the
+    number of attempts (1 + retries performed by urllib3) under the endpoint
+    name.
+    """
+    def _request(self, method, endpoint, url, **kwargs):
+        from requests import HTTPError, RequestException
+
+        kwargs.setdefault('timeout', self.timeout)
+
+        start = monotonic()
+
+        try:
+            r = self.session.request(method, url, **kwargs)
+        except RequestException as e:
+            self.instrumentation.count('http_errors', endpoint=endpoint, error=type(e).__name__)
+            raise
+
+        elapsed  = monotonic() - start
+        attempts = self._attempts(r)
+
+        self.stats.record(endpoint, elapsed, attempts)
+
+        if self.instrumentation.enabled:
+            self._instrument_request(method, endpoint, r, elapsed, attempts, kwargs.get('stream', False))
+
+        try:
+            r.raise_for_status()
+        except HTTPError:
+            # A streamed body is never read, so release its pooled connection here
+            if kwargs.get('stream', False):
+                r.close()
+            raise
+
+        return r
+
+    # r.elapsed stops once the headers are parsed, the rest is body transfer
+    def _instrument_request(self, method, endpoint, r, elapsed, attempts, stream):
+        headers = r.elapsed.total_seconds()
+
+        self.instrumentation.record('http_request', elapsed, endpoint=endpoint, method=method, status=r.status_code)
+        self.instrumentation.record('http_headers', headers, endpoint=endpoint)
+
+        if not stream:
+            self.instrumentation.record('http_body', max(elapsed - headers, 0.0), endpoint=endpoint)
+
+        if attempts > 1:
+            self.instrumentation.count('http_retries', attempts - 1, endpoint=endpoint)
+
+    def _get(self, endpoint, url, **kwargs):
+        return self._request('GET', endpoint, url, **kwargs)
+
+    def _head(self, endpoint, url, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+
+        return self._request('HEAD', endpoint, url, **kwargs)
+
+    @staticmethod
+    def _attempts(response):
+        retries = getattr(response.raw, 'retries', None)
+
+        if retries is None:
+            return 1
+
+        return len(retries.history) + 1
+
+    @property
+    def tle(self):
+        if self._tle_dict is not None:
+            return self._tle_dict
+
+        self._tle_dict = self.tle_store.to_dict()
+
+        return self._tle_dict
+
+    # Parsed TLEs indexed by name, NORAD id and international designator
+    @property
+    def tle_store(self):
+        if self._tle is not None:
+            return self._tle
+
+        self._tle = self.fetch_tle_store()
+
+        return self._tle
+
+    def fetch_tle_file(self, refresh=False):
+        if self.tle_cache is None:
+            return self._get('tle', self.tle_url).content.decode('utf-8')
+
+        content, meta = self.tle_cache.load()
+
+        if content is not None and not refresh and self.tle_cache.is_fresh(meta):
+            self.instrumentation.count('tle_cache', result='fresh')
+            return content
+
+        headers = self.tle_cache.validators(meta) if content is not None else {}
+        r = self._get('tle', self.tle_url, headers=headers)
+
+        if r.status_code == 304:
+            self.instrumentation.count('tle_cache', result='revalidated')
+            self.tle_cache.touch(meta)
+            return content
+
+        self.instrumentation.count('tle_cache', result='fetched')
+        self.tle_cache.store(r.content, r.headers)
+
+        return r.content.decode('utf-8')
+
+    def fetch_tle_dict(self):
+        return self.fetch_tle_store().to_dict()
+
+    # Raises TleParseError on a malformed or truncated TLE file
+    def fetch_tle_store(self):
+        text = self.fetch_tle_file()
+
+        with self.instrumentation.span('tle_parse'):
+            return TleStore.from_text(text)
+
+    # amsat.org/status/api/v1/sat_info.php?name=AO-91&hours=24
+    def get_sat_status(self, sat_name, hours=96):
+        params = {
+            'name': sat_name,
+            'hours': hours
+        }
+        return self._get_json('status', self.status_url, params)
+
+    # www.amsat.org/track/api/v1/passes.php?location=JN42&object=ISS
+    def get_sat_passes(self, location, sat_name):
+        params = {
+            'location': location, 
+            'object': sat_name
+        }
+        return self._get_json('passes', self.track_url, params)
+
+    def _get_json(self, endpoint, url, params):
+        if self.response_cache is None:
+            return self._fetch_json(endpoint, url, params)
+
+        return self.response_cache.cached(endpoint, params, lambda: self._fetch_json(endpoint, url, params))
+
+    def _fetch_json(self, endpoint, url, params):
+        r = self._get(endpoint, url, params=params)
+
+        with self.instrumentation.span('json_decode', endpoint=endpoint):
+            return r.json()
+
+    """
+    Offline alternative to get_sat_passes: a PassPredictor over this
+    client's TLEs whose get_sat_passes(location, sat_name) needs no network
+    round-trip, and whose predict(locations, sat_names) batches many pairs.
+    Requires NumPy and sgp4.
+    """
+    def pass_predictor(self, step=30.0, min_elevation=0.0):
+        from .predict import PassPredictor
+
+        return PassPredictor(self.tle_store, step=step, min_elevation=min_elevation)
+
+    # Batch ground tracks over this client's TLEs, see groundtrack.GroundTracker
+    def ground_tracker(self, step=60.0):
+        from .groundtrack import GroundTracker
+
+        return GroundTracker(self.tle_store, step=step)
+
+    """
+    Sub-satellite track of sat_name as NumPy arrays: 'time', 'position'
+    (ECEF km), 'latitude', 'longitude', 'altitude' and, with
+    footprint=True, 'footprint_radius' in km.  Requires NumPy and sgp4.
+    """
+    def ground_track(self, sat_name, start=None, hours=24, step=60.0, footprint=False, min_elevation=0.0):
+        return self.ground_tracker(step=step).ground_track(sat_name, start=start, hours=hours,
+                                                           footprint=footprint, min_elevation=min_elevation)
+
+    """
+    Stream uri to output_filename in chunk_size pieces so memory use stays
+    flat regardless of the archive size.  The body is written to a temporary
+    file next to the destination and renamed into place once complete.
+    progress - optional callable(bytes_done, bytes_total, elapsed_seconds),
+        called once before the first chunk with the starting point (the
+        bytes already on disk when resuming) and after every chunk;
+        bytes_total is None when the server sends no Content-Length
+    Returns the number of bytes written.
+    """
+    def _download_file(self, uri, output_filename, chunk_size=None, progress=None):
+        chunk_size = chunk_size if chunk_size is not None else self.DOWNLOAD_CHUNK_SIZE
+
+        start = monotonic()
+
+        with self.instrumentation.span('download', archive=os.path.basename(uri)):
+            with self._get('download', "{}{}".format(self.base_url, uri), stream=True) as r:
+                total = int(r.headers['Content-Length']) if 'Content-Length' in r.headers else None
+
+                with atomic_output(output_filename) as out_fp:
+                    done = self._write_chunks(r, out_fp, 0, total, start, chunk_size, progress)
+
+        self.instrumentation.count('download_bytes', done, archive=os.path.basename(uri))
+
+        return done
+
+    """
+    Resume a download into partial_filename starting at its current size.
+    The Range request carries if_range (an ETag or Last-Modified value), so a
+    server whose copy has changed answers 200 with the full body and the
+    partial file is restarted from zero.  A 416 means the partial is already
+    as long as the file: it is kept as complete when if_range was given and
+    the reported length matches, otherwise it is discarded and the download
+    restarted.  The completed file is renamed to output_filename.  Returns
+    (bytes_transferred, resumed).
+    """
+    def _download_file_resume(self, uri, output_filename, partial_filename, if_range=None,
+                              chunk_size=None, progress=None):
+        from requests import HTTPError
+
+        chunk_size = chunk_size if chunk_size is not None else self.DOWNLOAD_CHUNK_SIZE
+        offset = os.path.getsize(partial_filename) if os.path.exists(partial_filename) else 0
+
+        headers = {}
+        if offset > 0:
+            headers['Range'] = "bytes={}-".format(offset)
+            if if_range is not None:
+                headers['If-Range'] = if_range
+
+        start = monotonic()
+
+        try:
+            with self.instrumentation.span('download', archive=os.path.basename(uri)):
+                with self._get('download', "{}{}".format(self.base_url, uri), headers=headers, stream=True) as r:
+                    resumed = r.status_code == 206
+
+                    if not resumed:
+                        offset = 0
+
+                    length = int(r.headers['Content-Length']) if 'Content-Length' in r.headers else None
+                    total  = offset + length if length is not None else None
+
+                    with open(partial_filename, 'ab' if resumed else 'wb') as out_fp:
+                        done = self._write_chunks(r, out_fp, offset, total, start, chunk_size, progress)
+        except HTTPError as e:
+            if offset == 0 or e.response is None or e.response.status_code != 416:
+                raise
+
+            if if_range is not None and self._unsatisfied_length(e.response) == offset:
+                os.replace(partial_filename, output_filename)
+
+                return 0, True
+
+            # Partial longer than the remote file, or nothing to check it against
+            os.unlink(partial_filename)
+
+            return self._download_file_resume(uri, output_filename, partial_filename,
+                                              chunk_size=chunk_size, progress=progress)
+
+        self.instrumentation.count('download_bytes', done - offset, archive=os.path.basename(uri))
+
+        os.replace(partial_filename, output_filename)
+
+        return done - offset, resumed
+
+    # Complete length from a 416's "Content-Range: bytes */<length>", if given
+    @staticmethod
+    def _unsatisfied_length(r):
+        content_range = r.headers.get('Content-Range', '')
+
+        if not content_range.startswith('bytes */'):
+            return None
+
+        try:
+            return int(content_range[len('bytes */'):])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _write_chunks(r, out_fp, done, total, start, chunk_size, progress):
+        if progress is not None:
+            progress(done, total, monotonic() - start)
+
+        for chunk in r.iter_content(chunk_size=chunk_size):
+            out_fp.write(chunk)
+            done += len(chunk)
+
+            if progress is not None:
+                progress(done, total, monotonic() - start)
+
+        return done
+
+    # https://www.amsat.org/tlm/fox1d/FOXDB.tar.gz
+    def download_telemetry_database(self, sat_name, output_filename="FOXDB.tar.gz", progress=None):
+        uri = "/tlm/{}/FOXDB.tar.gz".format(sat_name)
+
+        return self._download_file(uri, output_filename, progress=progress)
+
+    # https://www.amsat.org/tlm/fox1d/serverlogs.tar.gz
+    def download_telemetry_serverlogs(self, sat_name, output_filename="serverlogs.tar.gz", progress=None):
+        uri = "/tlm/{}/serverlogs.tar.gz".format(sat_name)
+
+        return self._download_file(uri, output_filename, progress=progress)
+
+    """
+    Open a telemetry archive as a streaming response for
+    archive.iter_archive_members/iter_archive_records; use it as a context
+    manager so the connection is released.
+    """
+    def open_telemetry_archive(self, sat_name, archive="FOXDB.tar.gz"):
+        return self._get('download', "{}/tlm/{}/{}".format(self.base_url, sat_name, archive), stream=True)
+
+    """
+    Yield (member name, LogRecord) for the telemetry logs inside a remote
+    archive, decoded straight from the HTTP response without saving or
+    extracting it.  names/layouts filter members, see archive.iter_archive_members.
+    """
+    def iter_telemetry_records(self, sat_name, archive="FOXDB.tar.gz", names=None, layouts=None):
+        from .archive import iter_archive_records
+
+        with self.open_telemetry_archive(sat_name, archive=archive) as r:
+            for item in iter_archive_records(r, names=names, layouts=layouts):
+                yield item
+
+    """
+    Mirror the telemetry archives for sat_name into output_dir/<sat_name>/,
+    skipping archives unchanged since the last sync and resuming partial
+    downloads.  archives defaults to telemetry.TELEMETRY_ARCHIVES.  See
+    telemetry.TelemetrySync.
+    """
+    def sync_telemetry(self, sat_name, output_dir, archives=None, progress=None):
+        from .telemetry import TELEMETRY_ARCHIVES, TelemetrySync
+
+        archives = archives if archives is not None else TELEMETRY_ARCHIVES
+
+        return TelemetrySync(self, output_dir).sync(sat_name, archives=archives, progress=progress)
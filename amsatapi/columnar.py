@@ -0,0 +1,40 @@
+import json, os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""
+Read a columnar serverlog directory written by jythonbridge.py
+--convert-serverlog.  Returns (schema, columns) where columns maps column
+name to a NumPy array; with mmap=True (the default) the arrays are memory
+mapped, so only the columns and rows actually touched are read from disk.
+"""
+def read_columnar(path, columns=None, mmap=True):
+    if np is None:
+        raise ImportError("Reading columnar telemetry requires NumPy.  Install it with: pip install numpy")
+
+    with open(os.path.join(path, 'schema.json'), 'r') as fp:
+        schema = json.load(fp)
+
+    wanted = set(columns) if columns is not None else None
+    arrays = {}
+
+    for column in schema['columns']:
+        if wanted is not None and column['name'] not in wanted:
+            continue
+
+        filename = os.path.join(path, column['file'])
+
+        if schema['rows'] == 0:
+            arrays[column['name']] = np.empty(0, dtype=column['dtype'])
+        elif mmap:
+            arrays[column['name']] = np.memmap(filename, dtype=column['dtype'], mode='r', shape=(schema['rows'],))
+        else:
+            arrays[column['name']] = np.fromfile(filename, dtype=column['dtype'], count=schema['rows'])
+
+    if wanted is not None and wanted - set(arrays):
+        raise KeyError("Unknown columns: {}".format(", ".join(sorted(wanted - set(arrays)))))
+
+    return schema, arrays
@@ -0,0 +1,225 @@
+import glob, json, mmap, os
+from collections import namedtuple
+from datetime import datetime
+
+from .cache import atomic_write
+
+"""
+One telemetry log line: captureDate,id,resets,uptime,type followed by the
+layout fields.  capture_date is kept as the sortable integer YYYYMMDDHHMMSS
+and values holds the remaining fields as strings.
+"""
+LogRecord = namedtuple('LogRecord', ['capture_date', 'id', 'resets', 'uptime', 'type', 'values'])
+
+def parse_log_line(line):
+    if isinstance(line, bytes):
+        line = line.decode('utf-8', 'replace')
+
+    fields = line.rstrip("\r\n").split(",")
+
+    if len(fields) < 5:
+        raise ValueError("Malformed telemetry log line: {!r}".format(line))
+
+    return LogRecord(int(fields[0]), int(fields[1]), int(fields[2]), int(fields[3]), int(fields[4]), fields[5:])
+
+def capture_date_key(value):
+    if isinstance(value, datetime):
+        return int(value.strftime("%Y%m%d%H%M%S"))
+
+    return int(value)
+
+"""
+Random access into one FOXDB/serverlogs .log file.
+
+The file is memory mapped and split into blocks of block_rows lines.  A
+sparse index keeps, per block, its byte range and the min/max of resets,
+uptime and captureDate, and is persisted as JSON (in index_dir, or next to
+the log) keyed on the log's size and mtime so it is rebuilt only when the
+log changes.  Range queries read only the blocks whose bounds overlap.
+"""
+class FoxLogReader:
+
+    def __init__(self, path, index_dir=None, block_rows=1024):
+        self.path       = path
+        self.block_rows = block_rows
+
+        index_name = os.path.basename(path) + ".idx.json"
+        self.index_path = os.path.join(index_dir, index_name) if index_dir is not None else path + ".idx.json"
+
+        self._fp   = open(path, 'rb')
+        self._mmap = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) > 0 else None
+
+        self.blocks = self.load_index()
+
+        if self.blocks is None:
+            self.blocks = self.build_index()
+            self.save_index()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def file_signature(self):
+        stat = os.stat(self.path)
+
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'block_rows': self.block_rows}
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r') as fp:
+                index = json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+        return index['blocks'] if index.get('signature') == self.file_signature() else None
+
+    def save_index(self):
+        index = {'signature': self.file_signature(), 'blocks': self.blocks}
+
+        try:
+            atomic_write(self.index_path, json.dumps(index).encode('utf-8'))
+        except OSError:
+            # Read-only data directory, keep the index in memory only
+            pass
+
+    """
+    Block entries are [start, end, rows, min_resets, max_resets, min_uptime,
+    max_uptime, min_capture_date, max_capture_date].
+    """
+    def build_index(self):
+        blocks = []
+
+        if self._mmap is None:
+            return blocks
+
+        block = None
+
+        for start, end, record in self._scan(0, len(self._mmap)):
+            if block is None:
+                block = [start, end, 0, record.resets, record.resets, record.uptime, record.uptime,
+                         record.capture_date, record.capture_date]
+
+            block[1] = end
+            block[2] += 1
+            block[3], block[4] = min(block[3], record.resets), max(block[4], record.resets)
+            block[5], block[6] = min(block[5], record.uptime), max(block[6], record.uptime)
+            block[7], block[8] = min(block[7], record.capture_date), max(block[8], record.capture_date)
+
+            if block[2] >= self.block_rows:
+                blocks.append(block)
+                block = None
+
+        if block is not None:
+            blocks.append(block)
+
+        return blocks
+
+    def _scan(self, start, stop):
+        mm = self._mmap
+        pos = start
+
+        while pos < stop:
+            end = mm.find(b"\n", pos, stop)
+            end = stop if end < 0 else end + 1
+
+            line = mm[pos:end]
+
+            if line.strip():
+                try:
+                    yield pos, end, parse_log_line(line)
+                except ValueError:
+                    pass
+
+            pos = end
+
+    def __len__(self):
+        return sum(block[2] for block in self.blocks)
+
+    """
+    Yield LogRecords matching every given bound (inclusive).  capture dates
+    may be datetimes or YYYYMMDDHHMMSS integers.
+    """
+    def query(self, resets=None, uptime_min=None, uptime_max=None, date_min=None, date_max=None):
+        date_min = capture_date_key(date_min) if date_min is not None else None
+        date_max = capture_date_key(date_max) if date_max is not None else None
+
+        for block in self.blocks:
+            if resets is not None and not block[3] <= resets <= block[4]:
+                continue
+            if uptime_min is not None and block[6] < uptime_min:
+                continue
+            if uptime_max is not None and block[5] > uptime_max:
+                continue
+            if date_min is not None and block[8] < date_min:
+                continue
+            if date_max is not None and block[7] > date_max:
+                continue
+
+            for start, end, record in self._scan(block[0], block[1]):
+                if resets is not None and record.resets != resets:
+                    continue
+                if uptime_min is not None and record.uptime < uptime_min:
+                    continue
+                if uptime_max is not None and record.uptime > uptime_max:
+                    continue
+                if date_min is not None and record.capture_date < date_min:
+                    continue
+                if date_max is not None and record.capture_date > date_max:
+                    continue
+
+                yield record
+
+"""
+Reader over an extracted data directory laid out like FoxTelemJythonBridge
+expects: <data_path>/FOXDB and <data_path>/serverlogs holding .log files.
+Readers (and their indexes) are opened lazily and kept for reuse.
+"""
+class FoxDataReader:
+
+    def __init__(self, data_path, index_dir=None, block_rows=1024):
+        self.data_path       = data_path
+        self.foxdb_path      = os.path.join(data_path, 'FOXDB')
+        self.serverlogs_path = os.path.join(data_path, 'serverlogs')
+        self.index_dir       = index_dir
+        self.block_rows      = block_rows
+        self._readers        = {}
+
+        if index_dir is not None:
+            os.makedirs(index_dir, exist_ok=True)
+
+    def close(self):
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+
+    # Log file names relative to data_path, as accepted by reader() and query()
+    def log_files(self):
+        paths = glob.glob(os.path.join(self.foxdb_path, '**', '*.log'), recursive=True) + \
+            glob.glob(os.path.join(self.serverlogs_path, '**', '*.log'), recursive=True)
+
+        return sorted(os.path.relpath(path, self.data_path) for path in paths)
+
+    # name is a path relative to data_path, e.g. serverlogs/FOX4rttelemetry.log
+    def reader(self, name):
+        path = os.path.join(self.data_path, name)
+
+        if path not in self._readers:
+            index_dir = None
+
+            if self.index_dir is not None:
+                index_dir = os.path.join(self.index_dir, os.path.dirname(os.path.relpath(path, self.data_path)))
+                os.makedirs(index_dir, exist_ok=True)
+
+            self._readers[path] = FoxLogReader(path, index_dir=index_dir, block_rows=self.block_rows)
+
+        return self._readers[path]
+
+    def query(self, name, **bounds):
+        return self.reader(name).query(**bounds)
@@ -0,0 +1,110 @@
+from datetime import datetime
+
+from .predict import EARTH_FLATTENING, EARTH_RADIUS_KM, np, propagate_ecef, require_numpy_sgp4, satrec_array, time_grid, to_utc_naive
+
+# Mean Earth radius, for the spherical footprint geometry
+EARTH_MEAN_RADIUS_KM = 6371.0088
+
+"""
+Geodetic latitude/longitude (degrees) and height above the WGS84 ellipsoid
+(km) of ECEF positions of shape (..., 3), using Bowring's closed form,
+which is accurate to well under a metre at satellite altitudes.  NaN
+positions stay NaN.
+"""
+def ecef_to_geodetic(ecef):
+    x, y, z = ecef[..., 0], ecef[..., 1], ecef[..., 2]
+
+    a  = EARTH_RADIUS_KM
+    b  = a * (1 - EARTH_FLATTENING)
+    e2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+    ep2 = e2 / (1 - e2)
+
+    p = np.hypot(x, y)
+
+    # sin/cos of the parametric latitude without going through arctan2
+    q = np.hypot(z * a, p * b)
+    sin_theta, cos_theta = z * a / q, p * b / q
+
+    numerator   = z + ep2 * b * sin_theta ** 3
+    denominator = p - e2 * a * cos_theta ** 3
+    hypotenuse  = np.hypot(numerator, denominator)
+    sin_lat, cos_lat = numerator / hypotenuse, denominator / hypotenuse
+
+    lat = np.arctan2(numerator, denominator)
+    lon = np.arctan2(y, x)
+    alt = p * cos_lat + z * sin_lat - a * np.sqrt(1 - e2 * sin_lat ** 2)
+
+    return np.degrees(lat), np.degrees(lon), alt
+
+"""
+Great-circle radius (km) of the area on the ground from which a satellite
+at alt_km is seen at or above min_elevation degrees, on a spherical Earth:
+R * (arccos(R cos(e) / (R + h)) - e), i.e. R * arccos(R / (R + h)) at the
+horizon.
+"""
+def footprint_radius(alt_km, min_elevation=0.0):
+    elevation = np.radians(min_elevation)
+    ratio = EARTH_MEAN_RADIUS_KM * np.cos(elevation) / (EARTH_MEAN_RADIUS_KM + alt_km)
+
+    return EARTH_MEAN_RADIUS_KM * (np.arccos(np.clip(ratio, -1.0, 1.0)) - elevation)
+
+"""
+Batch ground tracks from a TleStore (normally AmsatApiClient.tle_store).
+
+Every requested satellite is propagated over one time grid of `step`
+seconds with the vectorized SGP4 in the sgp4 package, so the whole catalog
+for a day costs a single propagation call.
+
+track() returns a dict of NumPy arrays:
+    'names'            the satellites, in row order
+    'time'             (T,) datetime64[ms] UTC sample times
+    'position'         (S, T, 3) Earth-fixed (ECEF) positions in km
+    'latitude', 'longitude', 'altitude'
+                       (S, T) sub-satellite point in degrees and height in
+                       km, with subpoint=True (the default)
+    'footprint_radius' (S, T) visibility footprint radius in km, with
+                       footprint=True, for min_elevation degrees
+Samples where SGP4 failed (e.g. a decayed orbit) are NaN.
+"""
+class GroundTracker:
+
+    def __init__(self, tle_store, step=60.0):
+        require_numpy_sgp4()
+
+        self.tle_store = tle_store
+        self.step      = step
+
+    # Arrays for one satellite without the leading satellite axis, plus 'name'
+    def ground_track(self, sat_name, start=None, hours=24, subpoint=True, footprint=False, min_elevation=0.0):
+        track = self.track([sat_name], start=start, hours=hours, subpoint=subpoint,
+                           footprint=footprint, min_elevation=min_elevation)
+
+        names = track.pop('names')
+
+        return dict({key: value if key == 'time' else value[0] for key, value in track.items()}, name=names[0])
+
+    # sat_names defaults to every satellite in the store
+    def track(self, sat_names=None, start=None, hours=24, subpoint=True, footprint=False, min_elevation=0.0):
+        start = to_utc_naive(start) if start is not None else datetime.utcnow()
+
+        records = list(self.tle_store) if sat_names is None else [self.tle_store[sat_name] for sat_name in sat_names]
+        jd, fr, offsets = time_grid(start, hours * 3600.0, self.step)
+
+        track = {
+            'names':    [record.name for record in records],
+            'time':     np.datetime64(start, 'ms') + np.round(offsets * 1000).astype('timedelta64[ms]'),
+            'position': propagate_ecef(satrec_array(records), jd, fr),
+        }
+
+        if subpoint or footprint:
+            latitude, longitude, altitude = ecef_to_geodetic(track['position'])
+
+            if subpoint:
+                track['latitude']  = latitude
+                track['longitude'] = longitude
+                track['altitude']  = altitude
+
+            if footprint:
+                track['footprint_radius'] = footprint_radius(altitude, min_elevation)
+
+        return track
@@ -0,0 +1,243 @@
+import bisect, threading
+from collections import namedtuple
+from contextlib import contextmanager
+from time import monotonic
+
+from .cache import atomic_write
+
+"""
+One instrumentation event.  kind is 'span' (value is a duration in
+seconds) or 'counter' (value is an increment); labels is a tuple of
+sorted (name, value) pairs.
+"""
+Event = namedtuple('Event', ['kind', 'name', 'value', 'labels'])
+
+"""
+Hook registry shared by AmsatApiClient, ResponseCache and FoxTelemBridge.
+
+Hooks are callables taking an Event and are called synchronously on the
+thread that did the work, so they should be quick.  With no hooks
+subscribed span() and count() do no timing or allocation beyond the call
+itself.
+
+Spans emitted:
+    http_request     endpoint, method, status - whole request incl. retries
+    http_headers     endpoint - until the response headers were parsed
+    http_body        endpoint - reading a non-streamed body
+    json_decode      endpoint
+    tle_parse        -
+    download         archive - a streamed archive download
+    bridge_request   resource - client side round trip
+    bridge_serialize resource - encoding the request
+    bridge_queue / bridge_handle / bridge_encode  resource - inside the
+                     Jython service: waiting for a worker, FoxTelem call
+                     time and encoding the response
+Counters emitted:
+    http_retries     endpoint
+    http_errors      endpoint, error - requests that raised
+    cache_lookups    endpoint, result (hit/miss)
+    tle_cache        result (fresh/revalidated/fetched)
+    download_bytes   archive
+    bridge_restarts  -  FoxTelemBridgePool worker restarts
+"""
+class Instrumentation:
+
+    def __init__(self):
+        self.hooks = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.hooks)
+
+    def subscribe(self, hook):
+        with self._lock:
+            self.hooks = self.hooks + [hook]
+
+        return hook
+
+    def unsubscribe(self, hook):
+        with self._lock:
+            self.hooks = [h for h in self.hooks if h is not hook]
+
+    def emit(self, kind, name, value, labels):
+        event = Event(kind, name, value, tuple(sorted((key, str(v)) for key, v in labels.items())))
+
+        for hook in self.hooks:
+            hook(event)
+
+    def record(self, name, seconds, **labels):
+        if self.hooks:
+            self.emit('span', name, seconds, labels)
+
+    def count(self, name, value=1, **labels):
+        if self.hooks:
+            self.emit('counter', name, value, labels)
+
+    """
+    Time the enclosed block as a span.  Labels only known once the block
+    has run can be added to the yielded dict.
+    """
+    @contextmanager
+    def span(self, name, **labels):
+        if not self.hooks:
+            yield labels
+            return
+
+        start = monotonic()
+
+        try:
+            yield labels
+        finally:
+            self.emit('span', name, monotonic() - start, labels)
+
+# Used by every client, cache and bridge not given one of their own
+default_instrumentation = Instrumentation()
+
+"""
+Hook aggregating events into per-(name, labels) latency histograms and
+counters, exported in the Prometheus text format by to_prometheus() or
+as a plain-text profile by report().
+
+    metrics = MetricsCollector().attach()
+    ...
+    print(metrics.to_prometheus())
+"""
+class MetricsCollector:
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, buckets=None, prefix="amsatapi_"):
+        self.buckets    = tuple(buckets) if buckets is not None else self.DEFAULT_BUCKETS
+        self.prefix     = prefix
+        self.histograms = {}
+        self.counters   = {}
+        self._lock      = threading.Lock()
+        self._attached  = []
+
+    def __call__(self, event):
+        key = (event.name, event.labels)
+
+        with self._lock:
+            if event.kind == 'span':
+                histogram = self.histograms.get(key)
+
+                if histogram is None:
+                    histogram = self.histograms[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+
+                histogram['counts'][bisect.bisect_left(self.buckets, event.value)] += 1
+                histogram['sum']   += event.value
+                histogram['count'] += 1
+            else:
+                self.counters[key] = self.counters.get(key, 0) + event.value
+
+    def attach(self, instrumentation=None):
+        instrumentation = instrumentation if instrumentation is not None else default_instrumentation
+        instrumentation.subscribe(self)
+        self._attached.append(instrumentation)
+
+        return self
+
+    def detach(self):
+        for instrumentation in self._attached:
+            instrumentation.unsubscribe(self)
+        self._attached = []
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters   = {}
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+
+        if not pairs:
+            return ""
+
+        return "{" + ",".join('{}="{}"'.format(key, value.replace('\\', '\\\\').replace('"', '\\"')) for key, value in pairs) + "}"
+
+    def to_prometheus(self):
+        with self._lock:
+            histograms = sorted((key, dict(value, counts=list(value['counts']))) for key, value in self.histograms.items())
+            counters   = sorted(self.counters.items())
+
+        lines = []
+        typed = set()
+
+        for (name, labels), histogram in histograms:
+            metric = "{}{}_seconds".format(self.prefix, name)
+
+            if metric not in typed:
+                lines.append("# TYPE {} histogram".format(metric))
+                typed.add(metric)
+
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram['counts']):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(metric, self._labels(labels, [('le', repr(bound))]), cumulative))
+
+            lines.append("{}_bucket{} {}".format(metric, self._labels(labels, [('le', '+Inf')]), histogram['count']))
+            lines.append("{}_sum{} {!r}".format(metric, self._labels(labels), histogram['sum']))
+            lines.append("{}_count{} {}".format(metric, self._labels(labels), histogram['count']))
+
+        for (name, labels), value in counters:
+            metric = "{}{}_total".format(self.prefix, name)
+
+            if metric not in typed:
+                lines.append("# TYPE {} counter".format(metric))
+                typed.add(metric)
+
+            lines.append("{}{} {}".format(metric, self._labels(labels), value))
+
+        return "\n".join(lines) + "\n"
+
+    # For node_exporter's textfile collector
+    def write_textfile(self, path):
+        atomic_write(path, self.to_prometheus().encode('utf-8'))
+
+    # Upper bucket bound below which fraction of the samples fall
+    def _quantile(self, histogram, fraction):
+        target = fraction * histogram['count']
+        cumulative = 0
+
+        for bound, count in zip(self.buckets + (float('inf'),), histogram['counts']):
+            cumulative += count
+
+            if cumulative >= target:
+                return bound
+
+        return float('inf')
+
+    """
+    Profile of every span seen so far: count, mean and bucketed p50/p95/p99
+    (upper bucket bounds) per name and labels, slowest total time first.
+    """
+    def report(self):
+        with self._lock:
+            histograms = [(key, dict(value)) for key, value in self.histograms.items()]
+
+        histograms.sort(key=lambda item: item[1]['sum'], reverse=True)
+
+        names = [name + self._labels(labels) for (name, labels), histogram in histograms]
+        width = max([len(name) for name in names] + [4])
+
+        lines = ["{:<{width}} {:>7} {:>10} {:>9} {:>9} {:>9} {:>10}".format(
+            "span", "count", "mean ms", "p50 <=", "p95 <=", "p99 <=", "total s", width=width)]
+
+        for name, (key, histogram) in zip(names, histograms):
+            lines.append("{:<{width}} {:>7} {:>10.2f} {:>9} {:>9} {:>9} {:>10.3f}".format(
+                name,
+                histogram['count'],
+                histogram['sum'] / histogram['count'] * 1000,
+                self._format_bound(self._quantile(histogram, 0.50)),
+                self._format_bound(self._quantile(histogram, 0.95)),
+                self._format_bound(self._quantile(histogram, 0.99)),
+                histogram['sum'],
+                width=width))
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_bound(bound):
+        return "inf" if bound == float('inf') else "{:g}ms".format(bound * 1000)
@@ -0,0 +1,138 @@
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DECODE_CACHE_SIZE = 65536
+
+# (base character, divisions) of each character pair: field, square, subsquare, extended square
+LOCATOR_PAIRS = (('A', 18), ('0', 10), ('a', 24), ('0', 10))
+
+"""
+Decode a 4, 6 or 8 character Maidenhead locator (e.g. CM85, CM85ql,
+CM85ql42) to the (latitude, longitude) of the centre of its square.
+Results are memoized, so fixed station locators decode once per process.
+"""
+def locator_to_latlon(locator):
+    return _decode(locator.strip())
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _decode(locator):
+    if len(locator) not in (4, 6, 8):
+        raise ValueError("Maidenhead locator must be 4, 6 or 8 characters: {!r}".format(locator))
+
+    field, square = locator[0:2].upper(), locator[2:4]
+
+    if not ('A' <= field[0] <= 'R' and 'A' <= field[1] <= 'R' and square.isdigit()):
+        raise ValueError("Invalid Maidenhead locator: {!r}".format(locator))
+
+    lon = (ord(field[0]) - ord('A')) * 20.0 - 180.0 + int(square[0]) * 2.0
+    lat = (ord(field[1]) - ord('A')) * 10.0 - 90.0 + int(square[1]) * 1.0
+    lon_size, lat_size = 2.0, 1.0
+
+    if len(locator) >= 6:
+        subsquare = locator[4:6].lower()
+
+        if not ('a' <= subsquare[0] <= 'x' and 'a' <= subsquare[1] <= 'x'):
+            raise ValueError("Invalid Maidenhead locator: {!r}".format(locator))
+
+        lon_size, lat_size = lon_size / 24, lat_size / 24
+        lon += (ord(subsquare[0]) - ord('a')) * lon_size
+        lat += (ord(subsquare[1]) - ord('a')) * lat_size
+
+    if len(locator) == 8:
+        extended = locator[6:8]
+
+        if not extended.isdigit():
+            raise ValueError("Invalid Maidenhead locator: {!r}".format(locator))
+
+        lon_size, lat_size = lon_size / 10, lat_size / 10
+        lon += int(extended[0]) * lon_size
+        lat += int(extended[1]) * lat_size
+
+    return lat + lat_size / 2, lon + lon_size / 2
+
+def decode_cache_info():
+    return _decode.cache_info()
+
+def decode_cache_clear():
+    _decode.cache_clear()
+
+"""
+Encode a latitude/longitude as a Maidenhead locator of 4, 6 or 8 characters.
+"""
+def latlon_to_locator(lat, lon, precision=6):
+    if precision not in (4, 6, 8):
+        raise ValueError("Maidenhead precision must be 4, 6 or 8 characters")
+
+    lon = (lon + 180.0) % 360.0
+    lat = min(max(lat + 90.0, 0.0), 180.0)
+    lon_size, lat_size = 360.0, 180.0
+
+    locator = ""
+
+    for base, divisions in LOCATOR_PAIRS[:precision // 2]:
+        lon_size, lat_size = lon_size / divisions, lat_size / divisions
+
+        lon_index = min(int(lon // lon_size), divisions - 1)
+        lat_index = min(int(lat // lat_size), divisions - 1)
+
+        locator += chr(ord(base) + lon_index) + chr(ord(base) + lat_index)
+
+        lon -= lon_index * lon_size
+        lat -= lat_index * lat_size
+
+    return locator
+
+"""
+Batch decode: returns (latitudes, longitudes) as NumPy arrays.  Each
+distinct locator is decoded once through the memoized decoder and the
+results are scattered back, so a batch of millions drawn from a few thousand
+stations costs a few thousand decodes.
+"""
+def locators_to_latlon(locators):
+    _require_numpy()
+
+    unique, inverse = np.unique(np.asarray(locators, dtype=str), return_inverse=True)
+    decoded = np.array([locator_to_latlon(locator) for locator in unique], dtype=np.float64).reshape(-1, 2)
+
+    return decoded[inverse, 0], decoded[inverse, 1]
+
+"""
+Batch encode arrays of latitudes/longitudes in one vectorized pass.
+Returns a NumPy array of locator strings.
+"""
+def latlon_to_locators(lats, lons, precision=6):
+    _require_numpy()
+
+    if precision not in (4, 6, 8):
+        raise ValueError("Maidenhead precision must be 4, 6 or 8 characters")
+
+    lon = np.mod(np.asarray(lons, dtype=np.float64) + 180.0, 360.0)
+    lat = np.clip(np.asarray(lats, dtype=np.float64) + 90.0, 0.0, 180.0)
+
+    if lat.shape != lon.shape:
+        raise ValueError("lats and lons must have the same shape")
+
+    chars = np.empty(lat.shape + (precision,), dtype=np.uint8)
+    lon_size, lat_size = 360.0, 180.0
+
+    for i, (base, divisions) in enumerate(LOCATOR_PAIRS[:precision // 2]):
+        lon_size, lat_size = lon_size / divisions, lat_size / divisions
+
+        lon_index = np.minimum((lon // lon_size).astype(np.int64), divisions - 1)
+        lat_index = np.minimum((lat // lat_size).astype(np.int64), divisions - 1)
+
+        chars[..., 2 * i]     = ord(base) + lon_index
+        chars[..., 2 * i + 1] = ord(base) + lat_index
+
+        lon = lon - lon_index * lon_size
+        lat = lat - lat_index * lat_size
+
+    return chars.view('S{}'.format(precision)).reshape(lat.shape).astype(str)
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Batch locator conversion requires NumPy.  Install it with: pip install numpy")
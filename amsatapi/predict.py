@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta, timezone
+
+from .maidenhead import locator_to_latlon
+
+try:
+    import numpy as np
+    from sgp4.api import Satrec, SatrecArray, jday
+except ImportError:
+    np = None
+
+# WGS84
+EARTH_RADIUS_KM = 6378.137
+EARTH_FLATTENING = 1.0 / 298.257223563
+
+def require_numpy_sgp4():
+    if np is None:
+        raise ImportError("Local propagation requires NumPy and sgp4.  Install them with: pip install numpy sgp4")
+
+def to_utc_naive(dt):
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return dt
+
+"""
+Build a batched time grid as the (jd, fr) pair of arrays sgp4 expects:
+jd holds the whole Julian date of start and fr the day fraction of every
+sample, which keeps sub-millisecond precision in float64.
+"""
+def time_grid(start, seconds, step):
+    start = to_utc_naive(start)
+    jd0, fr0 = jday(start.year, start.month, start.day, start.hour, start.minute,
+                    start.second + start.microsecond / 1e6)
+
+    offsets = np.arange(0.0, seconds + step / 2.0, step)
+    fr = fr0 + offsets / 86400.0
+    jd = np.full_like(fr, jd0)
+
+    return jd, fr, offsets
+
+# Greenwich mean sidereal time in radians (IAU 1982), UTC used for UT1
+def gmst(jd, fr):
+    t = ((jd - 2451545.0) + fr) / 36525.0
+    seconds = 67310.54841 + (876600.0 * 3600.0 + 8640184.812866) * t + 0.093104 * t ** 2 - 6.2e-6 * t ** 3
+
+    return np.radians((seconds % 86400.0) / 240.0)
+
+def satrec_array(records):
+    return SatrecArray([Satrec.twoline2rv(record.line1, record.line2) for record in records])
+
+"""
+Propagate every satellite in a SatrecArray over the (jd, fr) grid in one
+vectorized call and rotate the TEME positions into Earth-fixed (ECEF)
+coordinates.  Returns an array of shape (satellites, times, 3) in km, with
+NaN rows where SGP4 reported an error (decayed orbit, etc.).
+"""
+def propagate_ecef(satellites, jd, fr):
+    error, r, _ = satellites.sgp4(jd, fr)
+
+    theta = gmst(jd, fr)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+
+    ecef = np.empty_like(r)
+    ecef[..., 0] =  cos_t * r[..., 0] + sin_t * r[..., 1]
+    ecef[..., 1] = -sin_t * r[..., 0] + cos_t * r[..., 1]
+    ecef[..., 2] =  r[..., 2]
+
+    ecef[error != 0] = np.nan
+
+    return ecef
+
+def geodetic_to_ecef(lat, lon, alt_km=0.0):
+    lat, lon = np.radians(lat), np.radians(lon)
+    e2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+    n = EARTH_RADIUS_KM / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+
+    return np.stack([
+        (n + alt_km) * np.cos(lat) * np.cos(lon),
+        (n + alt_km) * np.cos(lat) * np.sin(lon),
+        (n * (1 - e2) + alt_km) * np.sin(lat),
+    ], axis=-1)
+
+"""
+Elevation and azimuth (degrees) of ECEF positions of shape (..., 3) as seen
+from one observer at geodetic lat/lon.
+"""
+def look_angles(ecef, lat, lon, alt_km=0.0):
+    observer = geodetic_to_ecef(lat, lon, alt_km)
+    phi, lam = np.radians(lat), np.radians(lon)
+
+    rho = ecef - observer
+    east  = -np.sin(lam) * rho[..., 0] + np.cos(lam) * rho[..., 1]
+    north = -np.sin(phi) * np.cos(lam) * rho[..., 0] - np.sin(phi) * np.sin(lam) * rho[..., 1] + np.cos(phi) * rho[..., 2]
+    up    =  np.cos(phi) * np.cos(lam) * rho[..., 0] + np.cos(phi) * np.sin(lam) * rho[..., 1] + np.sin(phi) * rho[..., 2]
+
+    elevation = np.degrees(np.arctan2(up, np.hypot(east, north)))
+    azimuth   = np.degrees(np.arctan2(east, north)) % 360.0
+
+    return elevation, azimuth
+
+"""
+Offline pass predictor, interchangeable with AmsatApiClient.get_sat_passes.
+
+TLEs come from a TleStore (normally AmsatApiClient.tle_store) and observers
+are Maidenhead locators, as accepted by passes.php.  All satellites are
+propagated together with the vectorized SGP4 in the sgp4 package over one
+time grid of `step` seconds, so predicting for many observers x satellites
+costs a single propagation plus cheap per-observer geometry.
+
+Each pass is a dict with the object and location queried, the ISO 8601 UTC
+'start' (AOS), 'tca' (max elevation) and 'end' (LOS) times, 'duration' in
+seconds, 'max_elevation' and the AOS/LOS azimuths in degrees.  Passes already
+in progress at the start of the window are reported from the window start.
+"""
+class PassPredictor:
+
+    def __init__(self, tle_store, step=30.0, min_elevation=0.0):
+        require_numpy_sgp4()
+
+        self.tle_store     = tle_store
+        self.step          = step
+        self.min_elevation = min_elevation
+
+    def get_sat_passes(self, location, sat_name, start=None, hours=24):
+        return self.predict([location], [sat_name], start=start, hours=hours)[(location, sat_name)]
+
+    """
+    Predict passes for every (location, satellite) pair in one batch.
+    Returns {(location, sat_name): [pass, ...]}.
+    """
+    def predict(self, locations, sat_names, start=None, hours=24):
+        start = to_utc_naive(start) if start is not None else datetime.utcnow()
+
+        records = [self.tle_store[sat_name] for sat_name in sat_names]
+        jd, fr, offsets = time_grid(start, hours * 3600.0, self.step)
+        ecef = propagate_ecef(satrec_array(records), jd, fr)
+
+        passes = {}
+
+        for location in locations:
+            lat, lon = locator_to_latlon(location)
+            elevation, azimuth = look_angles(ecef, lat, lon)
+
+            for i, sat_name in enumerate(sat_names):
+                passes[(location, sat_name)] = [
+                    dict(p, object=sat_name, location=location)
+                    for p in self.find_passes(elevation[i], azimuth[i], offsets, start)
+                ]
+
+        return passes
+
+    def find_passes(self, elevation, azimuth, offsets, start):
+        above = np.nan_to_num(elevation, nan=-90.0) >= self.min_elevation
+
+        edges = np.diff(above.astype(np.int8))
+        rises = list(np.flatnonzero(edges == 1) + 1)
+        sets  = list(np.flatnonzero(edges == -1))
+
+        if above[0]:
+            rises.insert(0, 0)
+        if above[-1]:
+            sets.append(len(above) - 1)
+
+        passes = []
+
+        for rise, set_ in zip(rises, sets):
+            peak = rise + int(np.argmax(elevation[rise:set_ + 1]))
+
+            aos = self.crossing(elevation, offsets, rise - 1, rise) if rise > 0 else offsets[0]
+            los = self.crossing(elevation, offsets, set_, set_ + 1) if set_ < len(above) - 1 else offsets[-1]
+            tca, max_elevation = self.refine_peak(elevation, offsets, peak)
+
+            passes.append({
+                'start':         self.timestamp(start, aos),
+                'tca':           self.timestamp(start, tca),
+                'end':           self.timestamp(start, los),
+                'duration':      round(float(los - aos)),
+                'max_elevation': round(float(max_elevation), 1),
+                'aos_azimuth':   round(float(azimuth[rise]), 1),
+                'los_azimuth':   round(float(azimuth[set_]), 1),
+            })
+
+        return passes
+
+    # Time at which elevation crosses min_elevation between samples i and j
+    def crossing(self, elevation, offsets, i, j):
+        e0, e1 = elevation[i], elevation[j]
+
+        if not np.isfinite(e0) or not np.isfinite(e1) or e0 == e1:
+            return offsets[j]
+
+        return offsets[i] + (self.min_elevation - e0) / (e1 - e0) * (offsets[j] - offsets[i])
+
+    # Parabolic interpolation of the elevation peak around sample i
+    @staticmethod
+    def refine_peak(elevation, offsets, i):
+        if i == 0 or i == len(elevation) - 1:
+            return offsets[i], elevation[i]
+
+        y0, y1, y2 = elevation[i - 1], elevation[i], elevation[i + 1]
+        denominator = y0 - 2 * y1 + y2
+
+        if denominator == 0 or not np.isfinite(denominator):
+            return offsets[i], y1
+
+        shift = 0.5 * (y0 - y2) / denominator
+        step = offsets[i + 1] - offsets[i]
+
+        return offsets[i] + shift * step, y1 - 0.25 * (y0 - y2) * shift
+
+    @staticmethod
+    def timestamp(start, offset):
+        return (start + timedelta(seconds=float(offset))).strftime("%Y-%m-%dT%H:%M:%SZ")
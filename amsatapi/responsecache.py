@@ -0,0 +1,175 @@
+import json, sqlite3, threading
+from collections import OrderedDict
+from time import time
+
+from .instrument import default_instrumentation
+
+"""
+In-process LRU backend.  Values are stored as-is, so callers should treat
+results returned from the cache as read-only.
+"""
+class MemoryCacheBackend:
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._items  = OrderedDict()
+        self._lock   = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+
+            if item is not None:
+                self._items.move_to_end(key)
+
+            return item
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._items[key] = (value, expires)
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+"""
+SQLite backend, shareable between processes and persistent across runs.
+Values are stored as JSON; the least recently used rows are evicted once
+the table grows past maxsize.
+"""
+class SqliteCacheBackend:
+
+    def __init__(self, path, maxsize=10000):
+        self.path    = path
+        self.maxsize = maxsize
+        self._lock   = threading.Lock()
+        self._db     = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS response_cache_accessed ON response_cache (accessed)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM response_cache WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                return None
+
+            self._db.execute("UPDATE response_cache SET accessed = ? WHERE key = ?", (time(), key))
+
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires, time()))
+            self._db.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.maxsize,))
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM response_cache")
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+"""
+Response cache for AmsatApiClient.get_sat_status and get_sat_passes.
+
+Entries are keyed by endpoint and request params and expire after the TTL
+configured for their endpoint (ttls maps endpoint name to seconds, falling
+back to default_ttl).  Hit/miss counters are kept per endpoint and also
+emitted as cache_lookups counters to instrumentation.
+"""
+class ResponseCache:
+
+    DEFAULT_TTLS = {
+        'status': 60,
+        'passes': 300,
+    }
+
+    def __init__(self, backend=None, ttls=None, default_ttl=60, instrumentation=None):
+        self.backend     = backend if backend is not None else MemoryCacheBackend()
+        self.ttls        = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.counters    = {}
+        self._lock       = threading.Lock()
+
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation
+
+    @staticmethod
+    def key(endpoint, params):
+        return json.dumps([endpoint, sorted((name, str(value)) for name, value in params.items())])
+
+    def ttl(self, endpoint):
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, endpoint, params):
+        key  = self.key(endpoint, params)
+        item = self.backend.get(key)
+
+        if item is not None and item[1] <= time():
+            self.backend.delete(key)
+            item = None
+
+        self._count(endpoint, 'hits' if item is not None else 'misses')
+        self.instrumentation.count('cache_lookups', endpoint=endpoint, result='hit' if item is not None else 'miss')
+
+        return (True, item[0]) if item is not None else (False, None)
+
+    def set(self, endpoint, params, value):
+        self.backend.set(self.key(endpoint, params), value, time() + self.ttl(endpoint))
+
+    # Return the cached value for (endpoint, params), calling fetch() on a miss
+    def cached(self, endpoint, params, fetch):
+        hit, value = self.get(endpoint, params)
+
+        if hit:
+            return value
+
+        value = fetch()
+        self.set(endpoint, params, value)
+
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = {endpoint: dict(counts) for endpoint, counts in self.counters.items()}
+
+        for counts in stats.values():
+            total = counts['hits'] + counts['misses']
+            counts['hit_ratio'] = counts['hits'] / total if total else 0.0
+
+        return stats
+
+    def _count(self, endpoint, outcome):
+        with self._lock:
+            counts = self.counters.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counts[outcome] += 1
@@ -0,0 +1,172 @@
+import json, math, sqlite3, threading
+from datetime import datetime, timezone
+from time import time
+
+def parse_reported_time(value):
+    for fmt in ("%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp()
+        except (TypeError, ValueError):
+            continue
+
+    raise ValueError("Unrecognized reported_time: {!r}".format(value))
+
+"""
+Local append-only store of sat_info.php status reports.
+
+update_status(sat_name) asks the API only for the smallest `hours` window
+that covers the time since the newest stored report or the last poll,
+whichever is later (plus overlap_hours of margin for late submissions),
+dedupes the results against what is already
+stored and appends the new reports.  History queries are then answered from
+the local SQLite database.  Reports whose reported_time cannot be parsed are
+left out and counted per satellite in self.skipped.
+"""
+class StatusStore:
+
+    MAX_HOURS = 96
+
+    # Stored in PRAGMA user_version; bump with a matching step in _migrate
+    SCHEMA_VERSION = 1
+
+    def __init__(self, client, path, overlap_hours=1):
+        self.client        = client
+        self.path          = path
+        self.overlap_hours = overlap_hours
+        self.skipped       = {}
+        self._lock         = threading.Lock()
+        self._db           = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS status_reports ("
+            " name TEXT NOT NULL, reported_time TEXT NOT NULL, reported_at REAL NOT NULL,"
+            " callsign TEXT, report TEXT, grid_square TEXT, raw TEXT NOT NULL,"
+            " UNIQUE (name, reported_time, callsign, report, grid_square))")
+        self._migrate()
+        self._db.execute("CREATE INDEX IF NOT EXISTS status_reports_name_time ON status_reports (name, reported_at)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS status_sync ("
+            " name TEXT PRIMARY KEY, newest_report REAL, last_polled REAL NOT NULL)")
+
+    def _migrate(self):
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+
+        if version >= self.SCHEMA_VERSION:
+            return
+
+        self._db.execute("BEGIN")
+
+        try:
+            if version < 1:
+                # NULLs never compare equal in a UNIQUE key, so missing fields are now
+                # stored as ''; normalize older rows and drop the duplicates this exposes
+                self._db.execute(
+                    "UPDATE OR IGNORE status_reports SET callsign = COALESCE(callsign, ''),"
+                    " report = COALESCE(report, ''), grid_square = COALESCE(grid_square, '')"
+                    " WHERE callsign IS NULL OR report IS NULL OR grid_square IS NULL")
+                self._db.execute("DELETE FROM status_reports WHERE callsign IS NULL OR report IS NULL OR grid_square IS NULL")
+
+            self._db.execute("PRAGMA user_version = {:d}".format(self.SCHEMA_VERSION))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        self._db.close()
+
+    def sync_state(self, sat_name):
+        with self._lock:
+            row = self._db.execute("SELECT newest_report, last_polled FROM status_sync WHERE name = ?", (sat_name,)).fetchone()
+
+        return row if row is not None else (None, None)
+
+    def newest_report(self, sat_name):
+        return self.sync_state(sat_name)[0]
+
+    # Smallest hours window covering the gap since the last known report or poll
+    def hours_needed(self, sat_name, now=None):
+        newest, last_polled = self.sync_state(sat_name)
+
+        if last_polled is None:
+            return self.MAX_HOURS
+
+        now = now if now is not None else time()
+        since = max(newest or 0, last_polled)
+        hours = int(math.ceil(max(now - since, 0) / 3600.0)) + self.overlap_hours
+
+        return max(1, min(hours, self.MAX_HOURS))
+
+    """
+    Fetch and merge the reports posted since the last update.  Returns the
+    list of reports that were not already in the store.
+    """
+    def update_status(self, sat_name):
+        reports = self.client.get_sat_status(sat_name, hours=self.hours_needed(sat_name))
+
+        return self.merge(sat_name, reports)
+
+    def merge(self, sat_name, reports):
+        added = []
+
+        with self._lock:
+            self._db.execute("BEGIN")
+
+            try:
+                for report in reports:
+                    try:
+                        reported_at = parse_reported_time(report.get('reported_time'))
+                    except ValueError:
+                        self.skipped[sat_name] = self.skipped.get(sat_name, 0) + 1
+                        continue
+
+                    cursor = self._db.execute(
+                        "INSERT OR IGNORE INTO status_reports"
+                        " (name, reported_time, reported_at, callsign, report, grid_square, raw)"
+                        " VALUES (?, ?, ?, COALESCE(?, ''), COALESCE(?, ''), COALESCE(?, ''), ?)",
+                        (sat_name, report.get('reported_time'), reported_at,
+                         report.get('callsign'), report.get('report'), report.get('grid_square'),
+                         json.dumps(report)))
+
+                    if cursor.rowcount:
+                        added.append(report)
+
+                self._db.execute(
+                    "INSERT OR REPLACE INTO status_sync (name, newest_report, last_polled) VALUES (?, "
+                    " (SELECT MAX(reported_at) FROM status_reports WHERE name = ?), ?)",
+                    (sat_name, sat_name, time()))
+
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+        return added
+
+    """
+    Stored reports for sat_name, oldest first, optionally limited to the
+    last `hours` hours or to [since, until] epoch seconds.
+    """
+    def reports(self, sat_name, hours=None, since=None, until=None):
+        if hours is not None:
+            since = time() - hours * 3600.0
+
+        query  = "SELECT raw FROM status_reports WHERE name = ?"
+        params = [sat_name]
+
+        if since is not None:
+            query += " AND reported_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND reported_at <= ?"
+            params.append(until)
+
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY reported_at", params).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def satellites(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT name FROM status_sync ORDER BY name")]
@@ -0,0 +1,312 @@
+import gzip, json, os, threading
+from time import monotonic, sleep, time
+from urllib.parse import urlparse
+
+from .cache import atomic_write
+
+TELEMETRY_ARCHIVES = ('FOXDB.tar.gz', 'serverlogs.tar.gz')
+
+# Server directories under /tlm/, as listed by FoxTelem's gui.MainWindow.getFoxServerDir()
+TELEMETRY_SERVER_DIRS = ("ao85", "radfxsat", "fox1c", "fox1d", "fox1e", "husky")
+
+class ChecksumError(ValueError):
+    pass
+
+"""
+Incremental mirror of the /tlm/<sat>/ telemetry archives.
+
+Each archive lives at <output_dir>/<sat>/<archive>.  A manifest in
+output_dir records the ETag, Last-Modified and Content-Length of every
+completed archive, plus the validators of any in-progress download.  On
+sync a HEAD request decides whether the remote copy changed; unchanged
+archives are skipped, and an interrupted download whose remote copy is
+still the same resumes from its .part file with a Range request.
+"""
+class TelemetrySync:
+
+    MANIFEST_FILENAME = "telemetry-manifest.json"
+
+    def __init__(self, client, output_dir):
+        self.client        = client
+        self.output_dir    = output_dir
+        self.manifest_path = os.path.join(output_dir, self.MANIFEST_FILENAME)
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.manifest = self.load_manifest()
+        self._lock    = threading.RLock()
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self):
+        with self._lock:
+            atomic_write(self.manifest_path, json.dumps(self.manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    def update_entry(self, key, **fields):
+        with self._lock:
+            entry = self.manifest.setdefault(key, {})
+
+            for field, value in fields.items():
+                if value is None:
+                    entry.pop(field, None)
+                else:
+                    entry[field] = value
+
+            self.save_manifest()
+
+            return entry
+
+    def forget(self, key):
+        with self._lock:
+            self.manifest.pop(key, None)
+            self.save_manifest()
+
+    def archive_path(self, sat_name, archive):
+        return os.path.join(self.output_dir, sat_name, archive)
+
+    def sync(self, sat_name, archives=TELEMETRY_ARCHIVES, progress=None):
+        return [self.sync_archive(sat_name, archive, progress=progress) for archive in archives]
+
+    """
+    Bring one archive up to date.  Returns a dict with the archive name, the
+    action taken ('unchanged', 'downloaded' or 'resumed') and the number of
+    bytes transferred.
+    """
+    def sync_archive(self, sat_name, archive, progress=None):
+        key  = "{}/{}".format(sat_name, archive)
+        uri  = "/tlm/{}".format(key)
+        path = self.archive_path(sat_name, archive)
+        partial_path = path + ".part"
+
+        result = {'name': sat_name, 'archive': archive, 'path': path, 'transferred': 0}
+
+        remote = self.remote_validators(uri)
+        entry  = dict(self.manifest.get(key, {}))
+
+        if os.path.exists(path) and self.same_version(entry.get('complete'), remote) \
+                and os.path.getsize(path) == entry['complete'].get('size'):
+            result['action'] = 'unchanged'
+            return result
+
+        # A partial download is only valid against the version it was started from
+        if os.path.exists(partial_path) and not self.same_version(entry.get('partial'), remote):
+            os.unlink(partial_path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.update_entry(key, partial=remote)
+
+        if os.path.exists(partial_path) and remote.get('size') is not None \
+                and os.path.getsize(partial_path) == remote['size']:
+            # Completed transfer that died before the rename
+            os.replace(partial_path, path)
+            resumed = True
+        else:
+            result['transferred'], resumed = self.client._download_file_resume(
+                uri, path, partial_path, if_range=remote.get('etag') or remote.get('last_modified'), progress=progress)
+
+        self.update_entry(key, partial=None, complete=dict(remote, size=os.path.getsize(path), synced_at=time()))
+
+        result['action'] = 'resumed' if resumed else 'downloaded'
+
+        return result
+
+    def remote_validators(self, uri):
+        r = self.client._head('sync', "{}{}".format(self.client.base_url, uri))
+
+        return {
+            'etag':          r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'size':          int(r.headers['Content-Length']) if 'Content-Length' in r.headers else None,
+        }
+
+    """
+    Two validator sets describe the same remote file if their strongest
+    common validator matches.  With no validators at all nothing can be
+    assumed and the archive is treated as changed.
+    """
+    @staticmethod
+    def same_version(local, remote):
+        if not local:
+            return False
+
+        for field in ('etag', 'last_modified'):
+            if local.get(field) is not None and remote.get(field) is not None:
+                return local[field] == remote[field] and (
+                    remote.get('size') is None or local.get('size') in (None, remote['size']))
+
+        return False
+
+"""
+Token bucket shared by download workers to cap aggregate bandwidth.
+rate - bytes per second, None for unlimited
+burst - bytes that may pass without waiting (Default: a quarter second of rate)
+"""
+class BandwidthLimiter:
+
+    def __init__(self, rate=None, burst=None):
+        self.rate   = rate
+        self.burst  = burst if burst is not None else (rate * 0.25 if rate is not None else None)
+        self.tokens = self.burst
+        self.stamp  = monotonic()
+        self._lock  = threading.Lock()
+
+    def consume(self, nbytes):
+        if self.rate is None:
+            return
+
+        with self._lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate) - nbytes
+            self.stamp  = now
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            sleep(wait)
+
+"""
+Read an archive once, returning its SHA-256 and checking the gzip CRC of
+every member along the way.  Raises ChecksumError if the archive is
+truncated or corrupt.
+"""
+def verify_archive(path, chunk_size=1024 * 1024):
+    import hashlib
+
+    digest = hashlib.sha256()
+
+    class HashingReader:
+        def __init__(self, fp):
+            self.fp = fp
+
+        def read(self, size=-1):
+            data = self.fp.read(size)
+            digest.update(data)
+            return data
+
+    with open(path, 'rb') as raw_fp:
+        reader = HashingReader(raw_fp)
+
+        try:
+            with gzip.GzipFile(fileobj=reader, mode='rb') as gz_fp:
+                while gz_fp.read(chunk_size):
+                    pass
+        except (OSError, EOFError) as e:
+            raise ChecksumError("{}: {}".format(path, e))
+
+        # Drain anything the gzip reader left behind so the digest covers the whole file
+        while reader.read(chunk_size):
+            pass
+
+    return digest.hexdigest()
+
+"""
+Mirror the telemetry archives of many satellites in parallel.
+
+Downloads run on a pool of workers, with at most per_host transfers open
+against any one server and an optional aggregate bandwidth cap in bytes per
+second.  Each job goes through TelemetrySync, so unchanged archives are
+skipped and partial ones resumed.  With verify=True every newly transferred
+archive has its gzip CRCs checked and its SHA-256 recorded in the manifest
+and, when checksums maps "<sat>/<archive>" to an expected hex digest,
+compared against it.
+"""
+class TelemetryDownloadScheduler:
+
+    def __init__(self, client, output_dir, workers=4, per_host=2, max_rate=None, verify=True, checksums=None):
+        self.client    = client
+        self.sync      = TelemetrySync(client, output_dir)
+        self.workers   = workers
+        self.per_host  = per_host
+        self.limiter   = BandwidthLimiter(max_rate)
+        self.verify    = verify
+        self.checksums = checksums if checksums is not None else {}
+
+        self._host_slots = {}
+        self._lock       = threading.Lock()
+
+    def host_slot(self, host):
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+
+            return self._host_slots[host]
+
+    """
+    Download every (sat, archive) pair, returning a report with one result
+    per job plus aggregate bytes, seconds and throughput (bytes/second).
+    progress - optional callable(sat_name, archive, bytes_done, bytes_total, elapsed)
+    """
+    def run(self, sat_names=TELEMETRY_SERVER_DIRS, archives=TELEMETRY_ARCHIVES, progress=None):
+        # Imported here so the CLI can use this module's constants cheaply
+        from concurrent.futures import ThreadPoolExecutor
+
+        jobs = [(sat_name, archive) for sat_name in sat_names for archive in archives]
+
+        start = monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda job: self.run_job(job[0], job[1], progress), jobs))
+
+        elapsed     = monotonic() - start
+        transferred = sum(result['transferred'] for result in results)
+
+        return {
+            'results':     results,
+            'transferred': transferred,
+            'seconds':     elapsed,
+            'throughput':  transferred / elapsed if elapsed > 0 else 0.0,
+            'failed':      sum(1 for result in results if 'error' in result),
+        }
+
+    def run_job(self, sat_name, archive, progress=None):
+        key         = "{}/{}".format(sat_name, archive)
+        last        = [None]
+        transferred = [0]
+
+        # The first report of a transfer is its starting offset, already on disk
+        def on_chunk(done, total, elapsed):
+            if last[0] is not None:
+                self.limiter.consume(done - last[0])
+                transferred[0] += done - last[0]
+
+            last[0] = done
+
+            if progress is not None:
+                progress(sat_name, archive, done, total, elapsed)
+
+        start = monotonic()
+
+        try:
+            with self.host_slot(urlparse(self.client.base_url).netloc):
+                result = self.sync.sync_archive(sat_name, archive, progress=on_chunk)
+
+            if self.verify and result['action'] != 'unchanged':
+                result['sha256'] = self.check(key, result['path'])
+        except Exception as e:
+            result = {'name': sat_name, 'archive': archive, 'action': 'failed', 'transferred': transferred[0], 'error': str(e)}
+
+        result['seconds'] = monotonic() - start
+
+        return result
+
+    def check(self, key, path):
+        try:
+            sha256 = verify_archive(path)
+
+            if key in self.checksums and self.checksums[key].lower() != sha256:
+                raise ChecksumError("{}: expected sha256 {}, got {}".format(key, self.checksums[key], sha256))
+        except ChecksumError:
+            # Drop the bad copy so the next run downloads it again
+            os.unlink(path)
+            self.sync.forget(key)
+            raise
+
+        entry = self.sync.manifest.get(key, {})
+        self.sync.update_entry(key, complete=dict(entry.get('complete', {}), sha256=sha256))
+
+        return sha256
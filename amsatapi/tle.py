@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+
+class TleParseError(ValueError):
+    pass
+
+def tle_checksum(line):
+    return sum(int(c) if c.isdigit() else (1 if c == '-' else 0) for c in line[:68]) % 10
+
+# Decode the TLE implied-decimal exponent notation, e.g. " 10270-3" -> 0.10270e-3
+def _parse_exponent(field):
+    field = field.strip()
+
+    if not field:
+        return 0.0
+
+    sign = -1.0 if field[0] == '-' else 1.0
+    field = field.lstrip('+-')
+
+    mantissa, exponent = field[:-2], field[-2:]
+
+    return sign * float("0." + mantissa.strip()) * 10 ** int(exponent)
+
+"""
+One parsed TLE set.  Elements are decoded once at parse time; the raw lines
+are kept for callers (and propagators) that need the original text.
+
+Angles are in degrees, mean_motion in revolutions/day and epoch is a naive
+UTC datetime.
+"""
+class TleRecord:
+
+    __slots__ = (
+        'name', 'line1', 'line2',
+        'norad_id', 'classification', 'intl_designator',
+        'epoch', 'mean_motion_dot', 'mean_motion_ddot', 'bstar', 'element_set',
+        'inclination', 'raan', 'eccentricity', 'arg_perigee', 'mean_anomaly',
+        'mean_motion', 'rev_number'
+    )
+
+    def __init__(self, name, line1, line2, **elements):
+        self.name  = name
+        self.line1 = line1
+        self.line2 = line2
+
+        for field, value in elements.items():
+            setattr(self, field, value)
+
+    def __repr__(self):
+        return "TleRecord({!r}, norad_id={}, epoch={})".format(self.name, self.norad_id, self.epoch.isoformat())
+
+    @property
+    def lines(self):
+        return [self.line1, self.line2]
+
+    @classmethod
+    def parse(cls, name, line1, line2):
+        name = name.strip()
+
+        for number, line in (('1', line1), ('2', line2)):
+            if len(line) < 69 or line[0] != number or line[1] != ' ':
+                raise TleParseError("{}: malformed line {}: {!r}".format(name, number, line))
+
+            if not line[68].isdigit() or int(line[68]) != tle_checksum(line):
+                raise TleParseError("{}: checksum mismatch on line {}: {!r}".format(name, number, line))
+
+        if line1[2:7] != line2[2:7]:
+            raise TleParseError("{}: catalog numbers differ between lines ({} / {})".format(name, line1[2:7], line2[2:7]))
+
+        try:
+            epoch_year = int(line1[18:20])
+            epoch_year += 2000 if epoch_year < 57 else 1900
+            epoch = datetime(epoch_year, 1, 1) + timedelta(days=float(line1[20:32]) - 1)
+
+            return cls(
+                name, line1, line2,
+                norad_id=int(line1[2:7]),
+                classification=line1[7],
+                intl_designator=line1[9:17].strip(),
+                epoch=epoch,
+                mean_motion_dot=float(line1[33:43]),
+                mean_motion_ddot=_parse_exponent(line1[44:52]),
+                bstar=_parse_exponent(line1[53:61]),
+                element_set=int(line1[64:68]),
+                inclination=float(line2[8:16]),
+                raan=float(line2[17:25]),
+                eccentricity=float("0." + line2[26:33].strip()),
+                arg_perigee=float(line2[34:42]),
+                mean_anomaly=float(line2[43:51]),
+                mean_motion=float(line2[52:63]),
+                rev_number=int(line2[63:68])
+            )
+        except ValueError as e:
+            raise TleParseError("{}: invalid element field ({})".format(name, e))
+
+"""
+Parse a three-line (name + two element lines) TLE file such as nasabare.txt
+into TleRecords.  Blank lines are ignored; a truncated trailing set or any
+malformed set raises TleParseError naming the offending line.
+"""
+def parse_tle_text(text):
+    lines = [line.rstrip() for line in text.splitlines()]
+    lines = [(number, line) for number, line in enumerate(lines, 1) if line.strip()]
+
+    if len(lines) % 3 != 0:
+        raise TleParseError("Truncated TLE file: {} non-blank lines is not a multiple of 3".format(len(lines)))
+
+    for i in range(0, len(lines), 3):
+        (number, name), (_, line1), (_, line2) = lines[i:i + 3]
+
+        if name.startswith("1 ") or name.startswith("2 "):
+            raise TleParseError("Line {}: expected a satellite name, got element line {!r}".format(number, name))
+
+        yield TleRecord.parse(name, line1, line2)
+
+"""
+TLE records indexed by name, NORAD catalog number and international
+designator, all with O(1) lookup.  store[key] dispatches on the key type:
+ints are NORAD ids, strings are tried as names and then as designators.
+"""
+class TleStore:
+
+    def __init__(self, records=()):
+        self.by_name       = {}
+        self.by_norad_id   = {}
+        self.by_designator = {}
+
+        for record in records:
+            self.add(record)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(parse_tle_text(text))
+
+    def add(self, record):
+        self.by_name[record.name] = record
+        self.by_norad_id[record.norad_id] = record
+
+        if record.intl_designator:
+            self.by_designator[record.intl_designator] = record
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def __iter__(self):
+        return iter(self.by_name.values())
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        record = self.get(key)
+
+        if record is None:
+            raise KeyError(key)
+
+        return record
+
+    def get(self, key, default=None):
+        if isinstance(key, int):
+            return self.by_norad_id.get(key, default)
+
+        record = self.by_name.get(key)
+
+        if record is None:
+            record = self.by_designator.get(key)
+
+        return record if record is not None else default
+
+    def get_by_name(self, name):
+        return self.by_name[name]
+
+    def get_by_norad_id(self, norad_id):
+        return self.by_norad_id[int(norad_id)]
+
+    def get_by_designator(self, intl_designator):
+        return self.by_designator[intl_designator]
+
+    # Name -> [line1, line2], the format returned by AmsatApiClient.fetch_tle_dict
+    def to_dict(self):
+        return {record.name: record.lines for record in self}
@@ -0,0 +1,106 @@
+import heapq, threading
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+from .statusstore import StatusStore
+
+"""
+Long-running status poller for many satellites over one client (and so
+one pooled session).
+
+Each satellite has its own polling interval: it drops back to
+min_interval whenever a poll turns up new reports and is multiplied by
+backoff (up to max_interval) after every poll that finds nothing new or
+fails, so busy satellites are polled often and quiet ones rarely.
+
+New reports are found with a StatusStore, which only asks for the hours
+window since the last poll and dedupes against what it already holds; pass
+store (a StatusStore or a path) to keep that state across restarts,
+otherwise an in-memory store is used.  A report whose fields changed is
+stored, and reported, as a new one.
+
+skip_initial - record, but do not yield, what the first poll of each
+    satellite returns
+on_error - optional callable(sat_name, exception) for failed polls
+"""
+class StatusWatcher:
+
+    def __init__(self, client, sat_names, min_interval=60, max_interval=900, backoff=2.0,
+                 store=None, concurrency=4, skip_initial=False, on_error=None):
+        self.client       = client
+        self.sat_names    = list(sat_names)
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff      = backoff
+        self.concurrency  = concurrency
+        self.skip_initial = skip_initial
+        self.on_error     = on_error
+
+        if isinstance(store, StatusStore):
+            self.store = store
+        else:
+            self.store = StatusStore(client, store if store is not None else ":memory:")
+
+        self.intervals = {name: min_interval for name in self.sat_names}
+        self.errors    = {}
+        self._stop     = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def next_interval(self, sat_name, found_new):
+        if found_new:
+            interval = self.min_interval
+        else:
+            interval = min(self.intervals[sat_name] * self.backoff, self.max_interval)
+
+        self.intervals[sat_name] = interval
+
+        return interval
+
+    # Returns (new reports, error)
+    def poll(self, sat_name):
+        try:
+            return self.store.update_status(sat_name), None
+        except Exception as e:
+            return [], e
+
+    """
+    Yield (sat_name, report) for every new report, in poll order, until
+    stop() is called.  Poll errors are kept in self.errors (cleared by the
+    next successful poll) and the satellite backs off as if it were quiet.
+    """
+    def watch(self):
+        now      = time()
+        schedule = [(now, name) for name in self.sat_names]
+        polled   = set()
+
+        heapq.heapify(schedule)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while schedule and not self._stop.is_set():
+                if self._stop.wait(max(schedule[0][0] - time(), 0)):
+                    break
+
+                now = time()
+                due = []
+
+                while schedule and schedule[0][0] <= now:
+                    due.append(heapq.heappop(schedule)[1])
+
+                for sat_name, (reports, error) in zip(due, executor.map(self.poll, due)):
+                    if error is not None:
+                        self.errors[sat_name] = error
+
+                        if self.on_error is not None:
+                            self.on_error(sat_name, error)
+                    else:
+                        self.errors.pop(sat_name, None)
+
+                    if sat_name in polled or not self.skip_initial:
+                        for report in reports:
+                            yield sat_name, report
+
+                    polled.add(sat_name)
+
+                    heapq.heappush(schedule, (time() + self.next_interval(sat_name, bool(reports)), sat_name))
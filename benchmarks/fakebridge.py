@@ -0,0 +1,103 @@
+"""
+Stand-in for jythonbridge.py --start-service speaking the same line
+protocol (id-tagged JSON requests and responses, /ping, /batch, /exit and
+"timing" reports) with canned answers, so FoxTelemBridge round-trips can
+be measured without Jython or FoxTelem.  Run by
+FoxTelemBridge(script=..., interpreter=sys.executable).
+"""
+import json, sys, threading, time
+from argparse import ArgumentParser
+from queue import Queue
+
+CONFIG = {'homeDirectory': '/tmp/.FoxTelem', 'webSiteUrl': 'https://www.amsat.org/tlm'}
+
+def handle(event):
+    resource = event.get('resource', '').strip('/').split('/')
+    params   = event.get('params', {})
+
+    if resource[0] == 'batch':
+        return [handle(e) for e in params.get('events', [])]
+
+    if resource[0] == 'config':
+        return CONFIG
+
+    if resource[0] == 'spacecraft' and len(resource) > 2 and resource[2] == 'utctime':
+        if isinstance(params.get('resets'), list):
+            return {'status': 'ok', 'utctime': [1600000000000 + r * 86400000 + u * 1000 for r, u in zip(params['resets'], params['uptime'])]}
+
+        return {'status': 'ok', 'utctime': 1600000000000 + int(params.get('resets', 0)) * 86400000 + int(params.get('uptime', 0)) * 1000}
+
+    if resource[0] == 'spacecraft' and len(resource) > 1:
+        return {'foxId': resource[1], 'name': "Fox-{}".format(resource[1])}
+
+    return {'status': 'error', 'error': 'No handler for resource'}
+
+def main():
+    ap = ArgumentParser()
+    ap.add_argument('--start-service', action="store_true")
+    ap.add_argument('--workers', type=int, default=1)
+    args = ap.parse_args()
+
+    requests   = Queue()
+    emit_lock  = threading.Lock()
+    completed  = [0]
+
+    def emit(message):
+        with emit_lock:
+            sys.stdout.write(json.dumps(message) + "\n")
+            sys.stdout.flush()
+
+    def worker():
+        while True:
+            event = requests.get()
+
+            if event is None:
+                return
+
+            started  = time.time()
+            response = handle(event)
+
+            if '_received' in event:
+                handled = time.time()
+                encoded = json.dumps(response)
+                timing  = {'queue_ms': (started - event['_received']) * 1000, 'handle_ms': (handled - started) * 1000,
+                           'encode_ms': (time.time() - handled) * 1000}
+
+                with emit_lock:
+                    sys.stdout.write('{{"id": {}, "timing": {}, "response": {}}}\n'.format(json.dumps(event['id']), json.dumps(timing), encoded))
+                    sys.stdout.flush()
+            else:
+                emit({'id': event['id'], 'response': response})
+
+            completed[0] += 1
+
+    threads = [threading.Thread(target=worker) for i in range(args.workers)]
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    for line in sys.stdin:
+        event = json.loads(line)
+        resource = event.get('resource', '').strip('/')
+
+        if resource == 'exit':
+            break
+
+        if resource == 'ping':
+            emit({'id': event['id'], 'response': {'status': 'ok', 'completed': completed[0], 'queued': requests.qsize()}})
+            continue
+
+        if event.get('timing'):
+            event['_received'] = time.time()
+
+        requests.put(event)
+
+    for thread in threads:
+        requests.put(None)
+
+    for thread in threads:
+        thread.join()
+
+if __name__ == "__main__":
+    main()
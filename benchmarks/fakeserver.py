@@ -0,0 +1,157 @@
+import hashlib, io, json, os, tarfile, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from amsatapi.tle import tle_checksum
+
+LINE1 = "1 {:05d}U 98067A   26290.50000000  .00016717  00000-0  10270-3 0  999"
+LINE2 = "2 {:05d}  51.6416 247.4627 0006703 130.5360 325.0288 15.5008192533418"
+
+def _with_checksum(line):
+    return line + str(tle_checksum(line))
+
+# nasabare.txt style file with count three-line TLE sets
+def make_tle_text(count):
+    lines = []
+
+    for i in range(count):
+        norad_id = 40000 + i
+        lines += ["SAT-{}".format(i), _with_checksum(LINE1.format(norad_id)), _with_checksum(LINE2.format(norad_id))]
+
+    return "\n".join(lines) + "\n"
+
+# tar.gz holding one incompressible member, so the archive is about size bytes
+def make_archive(size):
+    payload = io.BytesIO()
+
+    with tarfile.open(fileobj=payload, mode='w:gz', compresslevel=1) as archive:
+        member = tarfile.TarInfo("FOXDB/FOX4rttelemetry.log")
+        member.size = size
+        archive.addfile(member, io.BytesIO(os.urandom(size)))
+
+    return payload.getvalue()
+
+def make_status(name, reports):
+    return [
+        {
+            'name':          name,
+            'reported_time': "2026-10-18T{:02d}:{:02d}:00Z".format((i // 60) % 24, i % 60),
+            'callsign':      "K{}ABC".format(i),
+            'report':        "Heard",
+            'grid_square':   "CM87"
+        }
+        for i in range(reports)
+    ]
+
+"""
+Local stand-in for the parts of amsat.org the client talks to:
+/tle/current/nasabare.txt, /status/api/v1/sat_info.php,
+/track/api/v1/passes.php and /tlm/<sat>/{FOXDB,serverlogs}.tar.gz.
+
+Bodies are generated once up front so the server itself costs as little
+as possible during a benchmark.  Point AmsatApiClient(base_url=server.url)
+at it; port 0 picks a free port.
+"""
+class FakeAmsatServer:
+
+    def __init__(self, tle_count=2000, status_reports=50, archive_size=32 * 1024 * 1024, port=0):
+        self.tle_text = make_tle_text(tle_count).encode('utf-8')
+        self.status   = json.dumps(make_status("AO-91", status_reports)).encode('utf-8')
+        self.passes   = json.dumps([{'start': "2026-10-18T00:00:00Z", 'duration': 600, 'max_elevation': 45}]).encode('utf-8')
+        self.archive  = make_archive(archive_size)
+        self.etags    = {}
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = "http://127.0.0.1:{}".format(self.httpd.server_address[1])
+        self._thread = None
+
+    def body(self, path):
+        if path.endswith('/nasabare.txt'):
+            return self.tle_text, 'text/plain'
+        if path.endswith('/sat_info.php'):
+            return self.status, 'application/json'
+        if path.endswith('/passes.php'):
+            return self.passes, 'application/json'
+        if path.startswith('/tlm/') and path.endswith('.tar.gz'):
+            return self.archive, 'application/gzip'
+
+        return None, None
+
+    def etag(self, body):
+        key = id(body)
+
+        if key not in self.etags:
+            self.etags[key] = '"{}"'.format(hashlib.md5(body).hexdigest())
+
+        return self.etags[key]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            # Headers and body go out in separate writes; don't let Nagle hold the body back
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self.respond(head=True)
+
+            def do_GET(self):
+                self.respond()
+
+            def respond(self, head=False):
+                body, content_type = server.body(urlparse(self.path).path)
+
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = server.etag(body)
+
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+
+                if not head:
+                    view = memoryview(body)
+
+                    for offset in range(0, len(body), 1024 * 1024):
+                        self.wfile.write(view[offset:offset + 1024 * 1024])
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="FakeAmsatServer")
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
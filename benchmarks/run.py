@@ -0,0 +1,238 @@
+"""
+Benchmark suite for the client, TLE parsing and the FoxTelem bridge, run
+entirely against local stand-ins (benchmarks.fakeserver and
+benchmarks.fakebridge), so results only measure this code.
+
+    python -m benchmarks.run -o results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.2
+
+Results are JSON.  Metrics named *_per_s are better when higher, *_ms and
+*_bytes when lower; --baseline compares those against an earlier run and
+exits non-zero when any regressed by more than --tolerance.
+"""
+import json, os, platform, statistics, subprocess, sys, tempfile, tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from time import perf_counter
+
+from amsatapi import AmsatApiClient
+from amsatapi.tle import TleStore
+from foxtelem_bridge import FoxTelemBridge
+
+from .fakeserver import FakeAmsatServer
+
+FAKE_BRIDGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fakebridge.py')
+REPO_ROOT   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {'p50_ms': at(0.50) * 1000, 'p95_ms': at(0.95) * 1000, 'p99_ms': at(0.99) * 1000}
+
+def bench_tle(server, repeat):
+    text = server.tle_text.decode('utf-8')
+
+    start = perf_counter()
+    for i in range(repeat):
+        store = TleStore.from_text(text)
+    parse_seconds = perf_counter() - start
+
+    with AmsatApiClient(base_url=server.url) as amsat:
+        start = perf_counter()
+        for i in range(repeat):
+            tles = amsat.fetch_tle_dict()
+        fetch_seconds = perf_counter() - start
+
+    return {
+        'satellites':                len(store),
+        'parse_sats_per_s':          len(store) * repeat / parse_seconds,
+        'fetch_tle_dict_sats_per_s': len(tles) * repeat / fetch_seconds,
+    }
+
+def bench_status(server, requests, concurrency):
+    latencies = []
+
+    with AmsatApiClient(base_url=server.url, pool_maxsize=concurrency) as amsat:
+        def timed(i):
+            start = perf_counter()
+            amsat.get_sat_status("AO-91", hours=24)
+            latencies.append(perf_counter() - start)
+
+        # Warm the connection pool before timing
+        amsat.get_sat_status("AO-91", hours=24)
+
+        start = perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(timed, range(requests)))
+        seconds = perf_counter() - start
+
+    return dict({'requests': requests, 'concurrency': concurrency, 'requests_per_s': requests / seconds}, **percentiles(latencies))
+
+def bench_download(server, output_dir):
+    output = os.path.join(output_dir, 'FOXDB.tar.gz')
+    size   = len(server.archive)
+
+    with AmsatApiClient(base_url=server.url) as amsat:
+        start = perf_counter()
+        amsat.download_telemetry_database('fox1d', output_filename=output)
+        seconds = perf_counter() - start
+
+        # Separate run under tracemalloc, which would skew the timing
+        tracemalloc.start()
+        amsat.download_telemetry_database('fox1d', output_filename=output)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'archive_bytes':    size,
+        'mb_per_s':         size / seconds / (1024 * 1024),
+        'peak_alloc_bytes': peak,
+    }
+
+def bench_bridge(calls, workers):
+    bridge = FoxTelemBridge(script=FAKE_BRIDGE, interpreter=sys.executable, workers=workers, timeout=30)
+
+    try:
+        bridge.get_config()
+
+        latencies = []
+        for i in range(calls):
+            start = perf_counter()
+            bridge._call('/spacecraft/4/utctime', params={'resets': 12, 'uptime': i})
+            latencies.append(perf_counter() - start)
+
+        start = perf_counter()
+        futures = [bridge.call_async('/spacecraft/4/utctime', params={'resets': 12, 'uptime': i}) for i in range(calls)]
+        for future in futures:
+            future.result(30)
+        pipelined_seconds = perf_counter() - start
+    finally:
+        bridge.close()
+
+    return dict({
+        'calls':                  calls,
+        'workers':                workers,
+        'mean_ms':                statistics.mean(latencies) * 1000,
+        'sequential_calls_per_s': calls / sum(latencies),
+        'pipelined_calls_per_s':  calls / pipelined_seconds,
+    }, **percentiles(latencies))
+
+# Median wall time of running argv in a fresh interpreter
+def time_process(argv, repeat):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+    samples = []
+
+    for i in range(repeat):
+        start = perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=REPO_ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(perf_counter() - start)
+
+    return statistics.median(samples) * 1000
+
+"""
+Process startup: a bare interpreter, importing the package and the client,
+and CLI invocations that need no network (--help, and a tle lookup served
+from a fresh on-disk TLE cache).
+"""
+def bench_startup(server, repeat):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        tle_argv = ['-m', 'amsatapi', '--base-url', server.url, '--cache-dir', cache_dir, 'tle', '-n', 'SAT-0']
+
+        # Populate the cache so the timed runs never touch the network
+        time_process(tle_argv, 1)
+
+        return {
+            'interpreter_ms':    time_process(['-c', 'pass'], repeat),
+            'import_package_ms': time_process(['-c', 'import amsatapi'], repeat),
+            'import_client_ms':  time_process(['-c', 'from amsatapi import AmsatApiClient'], repeat),
+            'cli_help_ms':       time_process(['-m', 'amsatapi', '--help'], repeat),
+            'cli_cached_tle_ms': time_process(tle_argv, repeat),
+        }
+
+BENCHMARKS = ['tle', 'status', 'download', 'bridge', 'startup']
+
+def run(names, quick=False):
+    scale   = 0.1 if quick else 1.0
+    results = {}
+
+    with FakeAmsatServer(tle_count=2000, archive_size=int(64 * 1024 * 1024 * scale)) as server:
+        if 'tle' in names:
+            results['tle'] = bench_tle(server, repeat=max(1, int(20 * scale)))
+        if 'status' in names:
+            results['status'] = bench_status(server, requests=max(10, int(1000 * scale)), concurrency=8)
+        if 'download' in names:
+            with tempfile.TemporaryDirectory() as output_dir:
+                results['download'] = bench_download(server, output_dir)
+        if 'startup' in names:
+            results['startup'] = bench_startup(server, repeat=max(3, int(20 * scale)))
+
+    if 'bridge' in names:
+        results['bridge'] = bench_bridge(calls=max(10, int(2000 * scale)), workers=4)
+
+    return {
+        'timestamp':  datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'python':     platform.python_version(),
+        'platform':   platform.platform(),
+        'quick':      quick,
+        'benchmarks': results,
+    }
+
+"""
+Compare two result documents.  Returns a list of (benchmark, metric,
+baseline, current, change) for metrics that got worse by more than
+tolerance (a fraction, 0.2 = 20%).
+"""
+def regressions(baseline, current, tolerance):
+    found = []
+
+    for name, metrics in current['benchmarks'].items():
+        for metric, value in metrics.items():
+            before = baseline.get('benchmarks', {}).get(name, {}).get(metric)
+
+            if not before or not isinstance(value, (int, float)):
+                continue
+
+            if metric.endswith('_per_s'):
+                change = (before - value) / before
+            elif metric.endswith('_ms') or metric.endswith('_bytes'):
+                change = (value - before) / before
+            else:
+                continue
+
+            if change > tolerance:
+                found.append((name, metric, before, value, change))
+
+    return found
+
+if __name__ == "__main__":
+    ap = ArgumentParser(description="Run the amsatapi benchmarks against local stand-in servers")
+    ap.add_argument('-b', '--benchmark', action="append", choices=BENCHMARKS, help="Benchmark to run, may be repeated (default: all)")
+    ap.add_argument('-o', '--output', help="Write results JSON here instead of stdout")
+    ap.add_argument('--quick', action="store_true", help="Smaller workloads, for a smoke test")
+    ap.add_argument('--baseline', help="Earlier results JSON to compare against")
+    ap.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown as a fraction before a metric counts as a regression")
+    args = ap.parse_args()
+
+    results = run(args.benchmark or BENCHMARKS, quick=args.quick)
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, 'r') as fp:
+            baseline = json.load(fp)
+
+        found = regressions(baseline, results, args.tolerance)
+
+        for name, metric, before, value, change in found:
+            print("REGRESSION {}.{}: {:.4g} -> {:.4g} ({:+.0%})".format(name, metric, before, value, change), file=sys.stderr)
+
+        sys.exit(1 if found else 0)
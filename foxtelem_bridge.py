@@ -1,27 +1,24 @@
-import logging, os, json, requests, shutil, subprocess
-import pickle
+import logging, os, json, requests, shutil, subprocess, threading
+import asyncio, itertools, pickle
 from argparse import ArgumentParser
+from concurrent.futures import Future, wait
+from time import monotonic
 from pprint import pprint
 
-class FoxTelemBridge:
+from amsatapi.instrument import default_instrumentation
 
-    def __init__(self, script=None, debug=False):
-        self.debug = debug
+class FoxTelemBridgeError(Exception):
+    pass
 
-        # Ensure Jython is installed and exit if not
-        self.jython_check()
+"""
+Requests and typed getters shared by FoxTelemBridge and FoxTelemBridgePool,
+built on the class's call_async.  Classes using it set self.timeout (the
+default wait in _call) and self.warm (an index_warm_state snapshot or None).
+"""
+class FoxTelemRequestMixin:
 
-        self.script = script if script is not None else os.path.join(os.getcwd(), 'jythonbridge.py')
-
-        self.p = p = subprocess.Popen([self.jython_path, self.script, '--start-service'], stdout=subprocess.PIPE, stdin=subprocess.PIPE)
-
-    def jython_check(self):
-        self.jython_path = shutil.which("jython")
-
-        if self.jython_path is None:
-            raise Exception("Jython not installed.  Please install Jython to proceed.  (https://www.jython.org/installation)")
-
-    def _call(self, resource, method='GET', params=None):
+    @staticmethod
+    def _event(resource, method='GET', params=None):
         event = {
             'resource': resource,
             'method':   method
@@ -30,32 +27,508 @@ class FoxTelemBridge:
         if params is not None and isinstance(params, dict):
             event['params'] = params
 
-        event_s = json.dumps(event) + "\n"
+        return event
 
-        if self.debug:
-            print("FoxTelemBridge: {}".format(event_s))
+    def _call(self, resource, method='GET', params=None, timeout=None):
+        return self.call_async(resource, method=method, params=params).result(timeout if timeout is not None else self.timeout)
+
+    async def acall(self, resource, method='GET', params=None):
+        return await asyncio.wrap_future(self.call_async(resource, method=method, params=params))
+
+    """
+    Send many requests as one /batch message.  calls is a list of
+    (resource, params) tuples; responses are returned in the same order.
+    """
+    def batch(self, calls, timeout=None):
+        events = [self._event(resource, params=params) for resource, params in calls]
+
+        return self._call('/batch', params={'events': events}, timeout=timeout)
+
+    """
+    Snapshot what a fresh bridge spends most of its startup on so later
+    bridges opened with warm_state=path can answer it immediately: the
+    config, the properties of each spacecraft in spacecraft_ids and the T0
+    of resets 0..max_resets-1.  Rewrite the snapshot when FoxTelem's
+    spacecraft files or T0 data change.
+    """
+    def save_warm_state(self, path, spacecraft_ids, max_resets=64, timeout=None):
+        state = {'version': WARM_STATE_VERSION, 'config': self._call('/config', timeout=timeout), 'spacecraft': {}}
+        resets = list(range(max_resets))
+
+        for id in spacecraft_ids:
+            properties = self._call("/spacecraft/{}".format(id), timeout=timeout)
+            utctimes   = self._call("/spacecraft/{}/utctime".format(id), params={'resets': resets, 'uptime': [0] * len(resets)}, timeout=timeout)
+
+            t0 = {}
+            if utctimes.get('status') == 'ok':
+                t0 = {str(reset): millis for reset, millis in zip(resets, utctimes['utctime']) if millis is not None}
 
-        self.p.stdin.write(event_s.encode('utf-8'))
-        self.p.stdin.flush()
+            state['spacecraft'][str(id)] = {'properties': properties, 't0': t0}
 
-        response = self.p.stdout.readline().decode('utf-8')[:-1]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as fp:
+            json.dump(state, fp)
+        os.replace(tmp_path, path)
 
-        return json.loads(response)
+        self.warm = index_warm_state(state)
+
+        return state
+
+    def _warm_spacecraft(self, id, name):
+        if self.warm is None:
+            return None
+
+        return self.warm['by_key'].get(str(id if id is not None else name))
 
     def get_config(self):
+        if self.warm is not None:
+            return self.warm['config']
+
         return self._call('/config')
 
     def get_spacecraft_properties(self, id=None, name=None):
         if id is None and name is None:
             raise ValueError("Must pass id or name")
 
+        warm = self._warm_spacecraft(id, name)
+        if warm is not None:
+            return warm['properties']
+
         return self._call("/spacecraft/{}".format(id if id is not None else name))
 
     def get_spacecraft_utctime(self, id=None, name=None, resets=0, uptime=0):
         if id is None and name is None:
             raise ValueError("Must pass id or name")
 
+        warm = self._warm_spacecraft(id, name)
+        if warm is not None and str(resets) in warm['t0']:
+            return {'status': 'ok', 'utctime': warm['t0'][str(resets)] + int(uptime) * 1000}
+
         params = {'resets': resets, 'uptime': uptime}
         return self._call("/spacecraft/{}/utctime".format(id if id is not None else name), params=params)
 
+    # Rerun the T0 update for a spacecraft, e.g. after new T0 data was published
+    def refresh_spacecraft(self, id=None, name=None):
+        if id is None and name is None:
+            raise ValueError("Must pass id or name")
+
+        return self._call("/spacecraft/{}/refresh".format(id if id is not None else name))
+
+    # Drop cached spacecraft lookups and T0 state, for one spacecraft or all
+    def invalidate_spacecraft_cache(self, id=None, name=None):
+        if id is None and name is None:
+            return self._call("/spacecraft/cache-invalidate")
+
+        return self._call("/spacecraft/{}/invalidate".format(id if id is not None else name))
+
+    """
+    Bulk conversions: resets and uptime are equal length sequences (lists or
+    NumPy arrays), or filename names a serverlog-style CSV read by the bridge
+    itself.  A large serverlog can take minutes, so pass a timeout well
+    above the bridge default for those.  Returns {'status': 'ok', 'utctime':
+    [millis or None, ...]}.
+    """
+    def get_spacecraft_utctimes(self, id=None, name=None, resets=None, uptime=None, filename=None, timeout=None):
+        warm = self._warm_spacecraft(id, name)
+
+        if warm is not None and filename is None and resets is not None and uptime is not None:
+            t0 = warm['t0']
+            resets, uptime = [int(r) for r in resets], [int(u) for u in uptime]
+
+            if len(resets) == len(uptime) and all(str(r) in t0 for r in set(resets)):
+                return {'status': 'ok', 'utctime': [t0[str(r)] + u * 1000 for r, u in zip(resets, uptime)]}
+
+        return self._bulk_call('utctime', id, name, resets, uptime, filename, timeout)
+
+    # Returns {'status': 'ok', 'latitude': [...], 'longitude': [...]}
+    def get_spacecraft_positions(self, id=None, name=None, resets=None, uptime=None, filename=None, timeout=None):
+        return self._bulk_call('position', id, name, resets, uptime, filename, timeout)
+
+    def _bulk_call(self, action, id, name, resets, uptime, filename, timeout=None):
+        if id is None and name is None:
+            raise ValueError("Must pass id or name")
+
+        if filename is not None:
+            params = {'file': os.path.abspath(filename)}
+        elif resets is not None and uptime is not None:
+            params = {'resets': [int(r) for r in resets], 'uptime': [int(u) for u in uptime]}
+        else:
+            raise ValueError("Must pass resets and uptime, or filename")
+
+        return self._call("/spacecraft/{}/{}".format(id if id is not None else name, action), params=params, timeout=timeout)
+
+"""
+Client for the jythonbridge.py line protocol.
+
+Every request is tagged with an id and responses are matched back to their
+request by id, so any number of threads (or asyncio tasks, via acall) can
+have requests in flight over the one subprocess at the same time.
+workers - request handling threads started inside the Jython service
+timeout - default seconds to wait for a response in _call
+warm_state - optional snapshot written by save_warm_state; config,
+    spacecraft properties and utctime lookups it covers are answered
+    locally, without waiting for the JVM to start
+interpreter - program that runs script, Jython from PATH by default
+instrumentation - amsatapi Instrumentation receiving bridge_* spans,
+    default_instrumentation unless given.  While it has hooks, requests
+    ask the service to report its queue, handling and encoding times.
+"""
+class FoxTelemBridge(FoxTelemRequestMixin):
+
+    def __init__(self, script=None, debug=False, workers=1, timeout=None, warm_state=None, interpreter=None,
+                 instrumentation=None):
+        self.debug   = debug
+        self.timeout = timeout
+        self.warm    = load_warm_state(warm_state) if warm_state is not None else None
+
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation
+
+        if interpreter is not None:
+            self.jython_path = interpreter
+        else:
+            # Ensure Jython is installed and exit if not
+            self.jython_check()
+
+        self.script = script if script is not None else os.path.join(os.getcwd(), 'jythonbridge.py')
+
+        self._spawned_at        = monotonic()
+        self._first_response_at = None
+
+        self.p = p = subprocess.Popen([self.jython_path, self.script, '--start-service', '--workers', str(workers)], stdout=subprocess.PIPE, stdin=subprocess.PIPE)
+
+        self._ids         = itertools.count(1)
+        self._pending     = {}
+        self._sent_at     = {}
+        self._started     = {}
+        self._lock        = threading.Lock()
+        self._write_lock  = threading.Lock()
+
+        self._reader = threading.Thread(target=self._read_responses, name="FoxTelemBridge-reader")
+        self._reader.daemon = True
+        self._reader.start()
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    # Seconds the longest outstanding request has been waiting, 0 when idle
+    @property
+    def oldest_request_age(self):
+        with self._lock:
+            oldest = min(self._sent_at.values(), default=None)
+
+        return monotonic() - oldest if oldest is not None else 0.0
+
+    @property
+    def alive(self):
+        return self.p.poll() is None
+
+    def ping(self, timeout=None):
+        return self._call('/ping', timeout=timeout)
+
+    def kill(self):
+        if self.alive:
+            self.p.kill()
+            self.p.wait()
+
+    def jython_check(self):
+        self.jython_path = shutil.which("jython")
+
+        if self.jython_path is None:
+            raise Exception("Jython not installed.  Please install Jython to proceed.  (https://www.jython.org/installation)")
+
+    def _read_responses(self):
+        for line in self.p.stdout:
+            if self._first_response_at is None:
+                self._first_response_at = monotonic()
+
+            try:
+                message = json.loads(line.decode('utf-8'))
+            except ValueError:
+                continue
+
+            if not isinstance(message, dict) or 'id' not in message:
+                continue
+
+            with self._lock:
+                future  = self._pending.pop(message['id'], None)
+                started = self._started.pop(message['id'], None)
+                self._sent_at.pop(message['id'], None)
+
+            if started is not None:
+                self._instrument_response(message, *started)
+
+            if future is not None:
+                future.set_result(message['response'])
+
+        # Bridge process exited, fail everything still waiting
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._sent_at.clear()
+
+        for future in pending.values():
+            future.set_exception(FoxTelemBridgeError("Bridge process exited"))
+
+    # Resource with the spacecraft id/name folded away, to keep label cardinality down
+    @staticmethod
+    def _resource_label(resource):
+        parts = resource.strip('/').split('/')
+
+        if parts[0] == 'spacecraft' and len(parts) > 1 and parts[1] != 'cache-invalidate':
+            parts[1] = '{id}'
+
+        return '/' + '/'.join(parts)
+
+    def _instrument_response(self, message, start, label):
+        self.instrumentation.record('bridge_request', monotonic() - start, resource=label)
+
+        for phase, ms in message.get('timing', {}).items():
+            self.instrumentation.record('bridge_' + phase[:-len('_ms')], ms / 1000.0, resource=label)
+
+    """
+    Send a request without waiting for it; returns a concurrent.futures.Future
+    resolved with the response.
+    """
+    def call_async(self, resource, method='GET', params=None):
+        event = self._event(resource, method=method, params=params)
+        future = Future()
+        instrumented = self.instrumentation.enabled
+
+        with self._lock:
+            event['id'] = next(self._ids)
+            self._pending[event['id']] = future
+            self._sent_at[event['id']] = monotonic()
+
+            if instrumented:
+                event['timing'] = True
+                self._started[event['id']] = (monotonic(), self._resource_label(resource))
+
+        if instrumented:
+            with self.instrumentation.span('bridge_serialize', resource=self._resource_label(resource)):
+                event_s = json.dumps(event) + "\n"
+        else:
+            event_s = json.dumps(event) + "\n"
+
+        if self.debug:
+            print("FoxTelemBridge: {}".format(event_s))
+
+        try:
+            with self._write_lock:
+                self.p.stdin.write(event_s.encode('utf-8'))
+                self.p.stdin.flush()
+        except (BrokenPipeError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(event['id'], None)
+                self._sent_at.pop(event['id'], None)
+                self._started.pop(event['id'], None)
+            raise FoxTelemBridgeError("Bridge process not accepting requests: {}".format(e))
+
+        return future
+
+    def close(self, timeout=10):
+        if self.p.poll() is None:
+            try:
+                with self._write_lock:
+                    self.p.stdin.write((json.dumps({'resource': '/exit'}) + "\n").encode('utf-8'))
+                    self.p.stdin.flush()
+                    self.p.stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass
+
+            try:
+                self.p.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.p.kill()
+                self.p.wait()
+
+        self._reader.join(timeout)
+
+    """
+    Startup cost of the bridge process: milliseconds from spawning it to its
+    first response (None until something has answered), plus the per-phase
+    timings the service reports at /config/timings.
+    """
+    def startup_timings(self, timeout=None):
+        server = self._call('/config/timings', timeout=timeout)
+        first  = self._first_response_at
+
+        return {
+            'first_response_ms': (first - self._spawned_at) * 1000 if first is not None else None,
+            'server':            server
+        }
+
+    # Start FoxTelem subsystems ahead of use, e.g. while the caller is busy elsewhere
+    def preload(self, subsystems=None, timeout=None):
+        params = {'subsystems': list(subsystems)} if subsystems is not None else None
+
+        return self._call('/config/init', params=params, timeout=timeout)
+
+WARM_STATE_VERSION = 1
+
+def load_warm_state(path):
+    with open(path, 'r') as fp:
+        state = json.load(fp)
+
+    if state.get('version') != WARM_STATE_VERSION:
+        raise FoxTelemBridgeError("Unsupported warm state version in {}".format(path))
+
+    return index_warm_state(state)
+
+# Index spacecraft snapshots by every key the bridge resolves: foxId and names
+def index_warm_state(state):
+    by_key = {}
+
+    for id, spacecraft in state['spacecraft'].items():
+        properties = spacecraft['properties']
+
+        for key in (id, properties.get('foxId'), properties.get('name'), properties.get('displayName')):
+            if key is not None:
+                by_key[str(key)] = spacecraft
+
+    return {'config': state['config'], 'by_key': by_key}
+
+"""
+Pool of Jython bridge processes, offering the same requests and typed
+getters as a single FoxTelemBridge.
+
+Requests go to the live worker with the fewest requests in flight.  A
+heartbeat thread pings all workers at once each heartbeat_interval seconds
+and restarts any that exited or did not answer within heartbeat_timeout.
+Pings are answered by the service's reader loop, so a worker busy with a
+long request still counts as alive.  With request_timeout set, a worker
+whose oldest outstanding request has waited longer than that is restarted
+as well; bulk calls over large serverlog files can take minutes, so leave
+it unset or set it above the slowest expected call.  Requests in flight on a restarted worker fail with
+FoxTelemBridgeError.  close() shuts every worker down through /exit.
+"""
+class FoxTelemBridgePool(FoxTelemRequestMixin):
+
+    def __init__(self, size=None, script=None, debug=False, workers=1, timeout=None,
+                 heartbeat_interval=5, heartbeat_timeout=30, request_timeout=None, warm_state=None,
+                 interpreter=None, instrumentation=None):
+        self.size    = size if size is not None else os.cpu_count()
+        self.debug   = debug
+        self.timeout = timeout
+        self.warm    = load_warm_state(warm_state) if warm_state is not None else None
+
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation
+
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout  = heartbeat_timeout
+        self.request_timeout    = request_timeout
+
+        self._bridge_kwargs = {'script': script, 'debug': debug, 'workers': workers, 'interpreter': interpreter,
+                               'instrumentation': self.instrumentation}
+        self._lock     = threading.Lock()
+        self._closed   = threading.Event()
+        self._bridges  = [self._start_bridge() for i in range(self.size)]
+        self.restarts  = 0
+
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="FoxTelemBridgePool-heartbeat")
+        self._heartbeat.daemon = True
+        self._heartbeat.start()
+
+    def _start_bridge(self):
+        return FoxTelemBridge(**self._bridge_kwargs)
+
+    # The pool has no process of its own, so these cover its workers instead
+    @property
+    def in_flight(self):
+        return sum(bridge.in_flight for bridge in self._bridges)
+
+    @property
+    def oldest_request_age(self):
+        return max(bridge.oldest_request_age for bridge in self._bridges)
+
+    @property
+    def alive(self):
+        return any(bridge.alive for bridge in self._bridges)
+
+    # One answer per worker; all pings are sent before waiting on any
+    def ping(self, timeout=None):
+        futures = [bridge.call_async('/ping') for bridge in self._bridges]
+
+        return [future.result(timeout if timeout is not None else self.timeout) for future in futures]
+
+    # Stop the heartbeat first so killed workers are not restarted
+    def kill(self):
+        self._closed.set()
+
+        for bridge in self._bridges:
+            bridge.kill()
+
+    def _least_loaded(self):
+        with self._lock:
+            candidates = [bridge for bridge in self._bridges if bridge.alive]
+
+            if not candidates:
+                raise FoxTelemBridgeError("No live bridge workers")
+
+            return min(candidates, key=lambda bridge: bridge.in_flight)
+
+    def call_async(self, resource, method='GET', params=None):
+        return self._least_loaded().call_async(resource, method=method, params=params)
+
+    def startup_timings(self, timeout=None):
+        return [bridge.startup_timings(timeout=timeout) for bridge in self._bridges]
+
+    def preload(self, subsystems=None, timeout=None):
+        return [bridge.preload(subsystems, timeout=timeout) for bridge in self._bridges]
+
+    def restart(self, index):
+        with self._lock:
+            old = self._bridges[index]
+            self._bridges[index] = self._start_bridge()
+            self.restarts += 1
+
+        old.kill()
+
+    def _heartbeat_loop(self):
+        while not self._closed.wait(self.heartbeat_interval):
+            bridges = list(self._bridges)
+
+            for index in self._unhealthy(bridges):
+                if self._closed.is_set():
+                    return
+
+                # Leave workers already replaced through restart() alone
+                if self._bridges[index] is bridges[index]:
+                    self.instrumentation.count('bridge_restarts')
+                    self.restart(index)
+
+    """
+    Indexes of the workers in bridges that exited, did not answer a ping
+    within heartbeat_timeout, or (with request_timeout) are stuck on a
+    request past its deadline.  Every ping is sent before waiting on any, so
+    one hung worker costs the check heartbeat_timeout once, not per worker.
+    """
+    def _unhealthy(self, bridges):
+        pings = {}
+        found = []
+
+        for index, bridge in enumerate(bridges):
+            try:
+                if bridge.alive:
+                    pings[index] = bridge.call_async('/ping')
+                    continue
+            except FoxTelemBridgeError:
+                pass
+
+            found.append(index)
+
+        wait(pings.values(), timeout=self.heartbeat_timeout)
+
+        for index, future in pings.items():
+            if not future.done() or future.exception() is not None:
+                found.append(index)
+            elif self.request_timeout is not None and bridges[index].oldest_request_age >= self.request_timeout:
+                found.append(index)
+
+        return sorted(found)
+
+    def close(self, timeout=10):
+        self._closed.set()
+        self._heartbeat.join(timeout)
 
+        for bridge in self._bridges:
+            bridge.close(timeout=timeout)
@@ -1,9 +1,12 @@
 # Python Init
-import csv, glob, json, os, pickle, sys
+import calendar, csv, glob, json, os, pickle, struct, sys, threading, time
+import Queue
 from argparse import ArgumentParser
 from pprint import pprint
 from datetime import datetime
 
+_SCRIPT_START = time.time()
+
 # Java Init
 jar_path = os.path.join(os.getcwd(), 'FoxTelem.jar')
 sys.path.append(jar_path)
@@ -17,6 +20,33 @@ from java.io import PrintStream, OutputStream
 from common import Config, FoxSpacecraft, FoxTime, Spacecraft, SatelliteManager, UpdateManager
 from telemetry import BitArrayLayout, FramePart, PayloadMaxValues, PayloadMinValues, PayloadRtValues
 
+_JAVA_IMPORTED = time.time()
+
+"""
+Wall time of each startup phase in milliseconds, served at /config/timings.
+"""
+class StartupTimings:
+
+    def __init__(self):
+        self.phases = []
+        self._lock  = threading.Lock()
+
+        self.record('java_imports', (_JAVA_IMPORTED - _SCRIPT_START) * 1000)
+
+    def record(self, phase, ms):
+        with self._lock:
+            self.phases.append({'phase': phase, 'ms': ms})
+
+    def time(self, phase, fn, *args):
+        start  = time.time()
+        result = fn(*args)
+        self.record(phase, (time.time() - start) * 1000)
+
+        return result
+
+    def to_dict(self):
+        with self._lock:
+            return {'phases': list(self.phases), 'uptime_ms': (time.time() - _SCRIPT_START) * 1000}
 
 class FoxTelemJythonBridge:
 
@@ -32,11 +62,39 @@ class FoxTelemJythonBridge:
         self.serverlogs_path = os.path.join(self.data_path, 'serverlogs')
         self.user_filename   = os.path.join(os.getcwd(), 'userfile.dat')
 
-        self.bridges = {
-           'config':     FoxTelemConfigBridge(),
-           'spacecraft': FoxTelemSatelliteManagerBridge(SatelliteManager(), UpdateManager(False))
+        self._emit_lock   = threading.Lock()
+        self._bridge_lock = threading.RLock()
+
+        # Bridges, and the FoxTelem subsystems behind them, start on first use
+        self.timings = StartupTimings()
+        self.bridges = {}
+        self.bridge_factories = {
+           'config':     lambda: FoxTelemConfigBridge(self.timings),
+           'spacecraft': lambda: FoxTelemSatelliteManagerBridge(SatelliteManager(), UpdateManager(False))
         }
 
+    # FoxTelem subsystems a bridge needs before it can be constructed
+    REQUIRED_SUBSYSTEMS = {
+        'spacecraft': ['satellite_manager'],
+    }
+
+    def get_bridge(self, name):
+        with self._bridge_lock:
+            if name not in self.bridges:
+                if name != 'config':
+                    self.get_bridge('config').ensure(self.REQUIRED_SUBSYSTEMS.get(name, []))
+
+                self.bridges[name] = self.timings.time('bridge_' + name, self.bridge_factories[name])
+
+            return self.bridges[name]
+
+    # Start every subsystem and bridge up front, as the bridge originally did
+    def init_all(self):
+        self.get_bridge('config').ensure(FoxTelemConfigBridge.SUBSYSTEMS)
+
+        for name in self.bridge_factories:
+            self.get_bridge(name)
+
     def enable_output(self):
         JavaSystem.setOut(self._java_stdout)
 
@@ -47,26 +105,101 @@ class FoxTelemJythonBridge:
     def get_config(self):
         return self.config.to_json()
 
-    def start(self):
-        self.run()
+    def start(self, workers=1):
+        self.run(workers=workers)
 
     def emit(self, d):
-        s = json.dumps(d) if isinstance(d, dict) else d
+        self.emit_line(json.dumps(d))
+
+    def emit_line(self, s):
         s += "\n"
-        sys.stdout.write(s)
-        sys.stdout.flush()
 
-    def run(self):
+        with self._emit_lock:
+            sys.stdout.write(s)
+            sys.stdout.flush()
+
+    """
+    Line protocol service loop.
+
+    Requests carrying an 'id' are answered with {"id": ..., "response": ...}
+    and may be answered out of order, so a client can keep many requests in
+    flight.  They are handed to a pool of `workers` threads; requests without
+    an 'id' get the bare response, as before.  /exit drains the queue first.
+    /ping is answered straight from this loop, ahead of queued work, with
+    the number of completed requests so a client can tell a busy worker from
+    a hung one.  Requests with "timing": true are answered with an extra
+    "timing" member giving queue_ms, handle_ms and encode_ms.
+    """
+    def run(self, workers=1):
+        self._queue     = Queue.Queue()
+        self._completed = 0
+        self._count_lock = threading.Lock()
+
+        threads = [threading.Thread(target=self.worker) for i in range(workers)]
+        for thread in threads:
+            thread.setDaemon(True)
+            thread.start()
+
         while True:
+            line = sys.stdin.readline()
+
+            # Client went away
+            if not line:
+                break
+
             try:
-                event = json.loads(sys.stdin.readline()[:-1])
-                self.process_event(event)
+                event = json.loads(line[:-1])
             except ValueError:
                 continue
 
+            resource = event.get('resource', '').strip('/')
+
+            if resource == 'exit':
+                break
+            elif resource == 'ping':
+                self.respond(event, {'status': 'ok', 'completed': self._completed, 'queued': self._queue.qsize()})
+                continue
+
+            if event.get('timing'):
+                event['_received'] = time.time()
 
+            self._queue.put(event)
 
-    def process_event(self, event):
+        self._queue.join()
+
+    def worker(self):
+        while True:
+            event = self._queue.get()
+            started = time.time()
+
+            try:
+                self.process_event(event, started)
+            except Exception as e:
+                self.respond(event, {'status': 'error', 'error': str(e)}, started)
+            finally:
+                with self._count_lock:
+                    self._completed += 1
+                self._queue.task_done()
+
+    def respond(self, event, response, started=None):
+        if 'id' not in event:
+            self.emit(response)
+        elif '_received' in event and started is not None:
+            handled = time.time()
+            encoded = json.dumps(response)
+            timing  = {
+                'queue_ms':  (started - event['_received']) * 1000,
+                'handle_ms': (handled - started) * 1000,
+                'encode_ms': (time.time() - handled) * 1000
+            }
+            self.emit_line('{"id": %s, "timing": %s, "response": %s}' % (json.dumps(event['id']), json.dumps(timing), encoded))
+        else:
+            self.emit({'id': event['id'], 'response': response})
+
+    def process_event(self, event, started=None):
+        self.respond(event, self.handle_event(event), started)
+
+    def handle_event(self, event):
         resource = event['resource'].split('/')
         method   = event['method'] if 'method' in event else 'GET'
         params   = event['params'] if 'params' in event else {}
@@ -78,14 +211,17 @@ class FoxTelemJythonBridge:
         try:
             bridge_name = resource.pop(0)
         except IndexError:
-            self.emit({'status': 'error', 'error': 'Invalid Request [missing bridge name]'})
+            return {'status': 'error', 'error': 'Invalid Request [missing bridge name]'}
 
         if bridge_name == 'exit':
             exit()
-        elif bridge_name in self.bridges:
-            self.emit(self.bridges[bridge_name].process_event(resource, method=method, params=params))
+        elif bridge_name == 'batch':
+            # /batch - params['events'] is a list of events answered in order in one message
+            return [self.handle_event(e) for e in params.get('events', [])]
+        elif bridge_name in self.bridge_factories:
+            return self.get_bridge(bridge_name).process_event(resource, method=method, params=params)
         else:
-            self.emit({'status': 'error', 'error': 'No handler for resource'})
+            return {'status': 'error', 'error': 'No handler for resource'}
 
     """
     def process_event(self, event):
@@ -108,16 +244,39 @@ class FoxTelemJythonBridge:
 class NoOutputStream(OutputStream):
     def write(self, b, off, len): pass
 
+"""
+FoxTelem Config bridge.  Only the directories are set up front; each
+Config.init* subsystem is started by ensure() the first time something
+needs it, in FoxTelem's original start-up order, and timed.
+"""
 class FoxTelemConfigBridge:
 
-    def __init__(self):
+    SUBSYSTEMS = ['satellite_manager', 'payload_store', 'pass_manager', 'sequence', 'server_queue']
+
+    SUBSYSTEM_INIT = {
+        'satellite_manager': 'initSatelliteManager',
+        'payload_store':     'initPayloadStore',
+        'pass_manager':      'initPassManager',
+        'sequence':          'initSequence',
+        'server_queue':      'initServerQueue',
+    }
+
+    def __init__(self, timings=None):
+        self.timings      = timings if timings is not None else StartupTimings()
+        self.initialized  = []
+        self._init_lock   = threading.RLock()
+
         Config.homeDirectory = JavaSystem.getProperty("user.home") + File.separator + ".FoxTelem"
         Config.currentDir = JavaSystem.getProperty("user.dir")
-        Config.initSatelliteManager()
-        Config.initPayloadStore()
-        Config.initPassManager()
-        Config.initSequence()
-        Config.initServerQueue()
+
+    def ensure(self, subsystems):
+        with self._init_lock:
+            for name in self.SUBSYSTEMS:
+                if name in subsystems and name not in self.initialized:
+                    self.timings.time('init_' + name, getattr(Config, self.SUBSYSTEM_INIT[name]))
+                    self.initialized.append(name)
+
+        return {'status': 'ok', 'initialized': list(self.initialized)}
 
     def process_event(self, resource, method='GET', params=None):
         if params is None:
@@ -127,6 +286,16 @@ class FoxTelemConfigBridge:
         if len(resource) < 1:
             return self.dict
 
+        # /config/timings
+        if resource[0] == 'timings':
+            return dict(self.timings.to_dict(), initialized=list(self.initialized))
+
+        # /config/init - params['subsystems'] defaults to all of them
+        if resource[0] == 'init':
+            return self.ensure(params.get('subsystems', self.SUBSYSTEMS))
+
+        return {'status': 'error', 'error': 'Unknown Action'}
+
     @property
     def dict(self):
         return self.to_dict()
@@ -155,6 +324,13 @@ class FoxTelemSatelliteManagerBridge:
         # Folders had to be copied from private method gui.MainWindow.getFoxServerDir()
         self.server_dirs = [None, "ao85", "radfxsat", "fox1c", "fox1d", "fox1e", "husky"]
 
+        # Resolved spacecraft by every alias used to request them, T0 update
+        # state and T0 millis per reset, keyed by foxId
+        self._spacecraft_cache = {}
+        self._t0_initialized   = set()
+        self._t0_millis        = {}
+        self._cache_lock       = threading.RLock()
+
     def process_event(self, resource, method='GET', params=None):
         if params is None:
             params = {}
@@ -165,7 +341,11 @@ class FoxTelemSatelliteManagerBridge:
 
         # /spacecraft/tle-update
         if resource[0] == 'tle-update':
-            return self.tle_update()
+            return self.update_tle()
+
+        # /spacecraft/cache-invalidate
+        if resource[0] == 'cache-invalidate':
+            return self.invalidate()
 
         # /spacecraft/1
         # /spacecraft/AO-91
@@ -182,10 +362,19 @@ class FoxTelemSatelliteManagerBridge:
         if action is None:
             # Return Properties for Spacecraft
             return self.get_spacecraft_properties(spacecraft)
+        elif action == 'refresh':
+            # /spacecraft/4/refresh - rerun the T0 update for this spacecraft
+            return self.refresh_spacecraft(spacecraft)
+        elif action == 'invalidate':
+            # /spacecraft/4/invalidate - drop cached lookup and T0 state
+            return self.invalidate(spacecraft)
         elif action == 'foxdb-download':
             return {'status': 'error', 'error': 'not-implemented'}
         elif action == 'position':
             # /spacecraft/4/position
+            if self.is_bulk(params):
+                return self.get_positions(spacecraft, *self.bulk_params(params))
+
             if 'resets' not in params or 'uptime' not in params:
                 return {'status': 'error', 'error': 'MISSING_PARAM'}
 
@@ -195,6 +384,9 @@ class FoxTelemSatelliteManagerBridge:
             return self.get_t0_table(spacecraft)
         elif action == 'utctime':
             # /spacecraft/4/utctime
+            if self.is_bulk(params):
+                return self.get_utctimes(spacecraft, *self.bulk_params(params))
+
             if 'resets' not in params or 'uptime' not in params:
                 return {'status': 'error', 'error': 'MISSING_PARAM'}
 
@@ -205,10 +397,71 @@ class FoxTelemSatelliteManagerBridge:
     def get_all_spacecraft(self):
         return self.satellite_manager.getSpacecraftList()
 
-    def init_spacecraft(self, spacecraft):
-        self.update_manager.updateT0(spacecraft)
+    """
+    Run the T0 update once per spacecraft; later lookups reuse it until
+    refresh_spacecraft or invalidate is requested.
+    """
+    def init_spacecraft(self, spacecraft, refresh=False):
+        with self._cache_lock:
+            if spacecraft.foxId in self._t0_initialized and not refresh:
+                return
+
+            self.update_manager.updateT0(spacecraft)
+            self._t0_initialized.add(spacecraft.foxId)
+            self._t0_millis.pop(spacecraft.foxId, None)
+
+    def refresh_spacecraft(self, spacecraft):
+        self.init_spacecraft(spacecraft, refresh=True)
+
+        return {'status': 'ok'}
+
+    def invalidate(self, spacecraft=None):
+        with self._cache_lock:
+            if spacecraft is None:
+                self._spacecraft_cache.clear()
+                self._t0_initialized.clear()
+                self._t0_millis.clear()
+            else:
+                for alias in [a for a, s in self._spacecraft_cache.items() if s.foxId == spacecraft.foxId]:
+                    del self._spacecraft_cache[alias]
+
+                self._t0_initialized.discard(spacecraft.foxId)
+                self._t0_millis.pop(spacecraft.foxId, None)
+
+        return {'status': 'ok'}
+
+    def spacecraft_aliases(self, spacecraft):
+        aliases = [str(spacecraft.foxId)]
+
+        for attr in ('user_keps_name', 'user_display_name', 'name'):
+            value = getattr(spacecraft, attr, None)
+
+            if value:
+                aliases.append(value)
+
+        return aliases
 
     def get_spacecraft(self, spacecraft_resource):
+        key = str(spacecraft_resource)
+
+        with self._cache_lock:
+            spacecraft = self._spacecraft_cache.get(key)
+
+        if spacecraft is None:
+            spacecraft = self.lookup_spacecraft(spacecraft_resource)
+
+            if spacecraft is None:
+                return None
+
+            with self._cache_lock:
+                for alias in self.spacecraft_aliases(spacecraft) + [key]:
+                    self._spacecraft_cache[alias] = spacecraft
+
+        self.init_spacecraft(spacecraft)
+
+        return spacecraft
+
+    def lookup_spacecraft(self, spacecraft_resource):
         if isinstance(spacecraft_resource, int) or spacecraft_resource.isnumeric():
             # /spacecraft/1
 
@@ -221,9 +474,6 @@ class FoxTelemSatelliteManagerBridge:
             if spacecraft is None:
                 spacecraft = self.satellite_manager.getSpacecraftByDisplayName(spacecraft_resource)
 
-        if spacecraft is not None:
-            self.init_spacecraft(spacecraft)
-
         return spacecraft
 
     def get_spacecraft_properties(self, spacecraft):
@@ -244,6 +494,71 @@ class FoxTelemSatelliteManagerBridge:
     def get_utctime(self, spacecraft, reset, uptime):
         return {'status': 'ok', 'utctime': spacecraft.getUtcDateTimeForReset(reset, uptime).getMillis()}
 
+    """
+    Bulk mode for utctime/position: 'resets' and 'uptime' given as equal
+    length lists, or 'file' naming a CSV (serverlog layout by default) whose
+    resets/uptime columns are 'resets_column'/'uptime_column'.
+    """
+    def is_bulk(self, params):
+        return 'file' in params or isinstance(params.get('resets'), list)
+
+    def bulk_params(self, params):
+        if 'file' in params:
+            resets_column = int(params.get('resets_column', 2))
+            uptime_column = int(params.get('uptime_column', 3))
+
+            resets, uptimes = [], []
+
+            with open(params['file'], 'r') as fp:
+                for row in csv.reader(fp):
+                    if len(row) <= max(resets_column, uptime_column):
+                        continue
+
+                    resets.append(int(row[resets_column]))
+                    uptimes.append(int(row[uptime_column]))
+
+            return resets, uptimes
+
+        if not isinstance(params.get('uptime'), list) or len(params['uptime']) != len(params['resets']):
+            raise ValueError("Bulk requests need equal length 'resets' and 'uptime' lists")
+
+        return [int(r) for r in params['resets']], [int(u) for u in params['uptime']]
+
+    """
+    utctime for many (reset, uptime) pairs.  T0 of each distinct reset is
+    looked up once and every pair becomes T0 + uptime, so a whole serverlog
+    costs one getUtcDateTimeForReset call per reset rather than per frame.
+    T0 values stay cached until the spacecraft is refreshed or invalidated.
+    """
+    def get_utctimes(self, spacecraft, resets, uptimes):
+        with self._cache_lock:
+            t0 = self._t0_millis.setdefault(spacecraft.foxId, {})
+
+        utctimes = []
+
+        for reset, uptime in zip(resets, uptimes):
+            if reset not in t0:
+                start = spacecraft.getUtcDateTimeForReset(reset, 0)
+                t0[reset] = start.getMillis() if start is not None else None
+
+            utctimes.append(t0[reset] + uptime * 1000 if t0[reset] is not None else None)
+
+        return {'status': 'ok', 'utctime': utctimes}
+
+    def get_positions(self, spacecraft, resets, uptimes):
+        latitudes, longitudes = [], []
+
+        for reset, uptime in zip(resets, uptimes):
+            try:
+                satpos = spacecraft.getSatellitePosition(reset, uptime)
+            except PositionCalcException:
+                satpos = None
+
+            latitudes.append(satpos.getLatitude() if satpos is not None else None)
+            longitudes.append(satpos.getLongitude() if satpos is not None else None)
+
+        return {'status': 'ok', 'latitude': latitudes, 'longitude': longitudes}
+
     def get_t0_table(self, spacecraft):
         table = spacecraft.getT0TableData()
 
@@ -261,27 +576,6 @@ class FoxTelemSatelliteManagerBridge:
 
         return {"status": "ok"}
 
-if __name__ == "__main__":
-    ap = ArgumentParser()
-
-    ap.add_argument('--jar-path')
-    ap.add_argument('--start-service', action="store_true")
-    ap.add_argument('-e', '--event')
-    ap.add_argument('--java-stdout', action="store_true") # Turn on Java System Stdout for Debugging
-
-    args = ap.parse_args()
-
-    bridge = FoxTelemJythonBridge(jar_path=args.jar_path, enable_java_stdout=args.java_stdout)
-
-    if args.start_service:
-        bridge.start()
-    elif args.event is not None:
-        bridge.process_event(json.loads(args.event))
-    else:
-        print("Nothing to do...")
-
-exit()
-
 class AmsatTelemetryParser:
 
     def __init__(self, spacecraft):
@@ -377,31 +671,265 @@ class AmsatTelemetryDataMigrator:
         output_fp.close()
 
 
-if __name__ == "__main__":
-    ap = ArgumentParser()
+"""
+Streaming serverlog to columnar converter.
 
-    subparsers = ap.add_subparsers(dest='command')
+The log is read in chunks of chunk_rows lines by one thread, decoded by a
+pool of worker threads and written back in order, one little-endian binary
+file per column, so memory stays bounded by the number of chunks in flight.
+Every layout field produces a '<field>.raw' int32 column with the raw value
+and a '<field>' float64 column with the converted engineering value, next
+to captureDate (epoch millis), id, resets, uptime and type.  schema.json
+describes the columns; amsatapi.columnar.read_columnar maps them straight
+into NumPy arrays.
+"""
+class ServerlogColumnarConverter:
 
-    config_p = subparsers.add_parser('write-config')
+    HEADER_COLUMNS = [('captureDate', '<i8'), ('id', '<i4'), ('resets', '<i4'), ('uptime', '<i8'), ('type', '<i4')]
 
-    config_p.add_argument('output', default='foxtelem.config.json')
+    STRUCT_CODES = {'<i4': 'i', '<i8': 'q', '<f8': 'd'}
 
-    """
-    ap.add_argument('spacecraft', help="Spacecraft Name (ie. FOX1D)")
-    ap.add_argument('-l', '--layout', help="REAL_TIME, MIN or MAX")
-    ap.add_argument('-o', '--output', help="Output Filename")
+    def __init__(self, migrator, chunk_rows=10000, workers=4):
+        self.migrator   = migrator
+        self.chunk_rows = chunk_rows
+        self.workers    = workers
+
+        self._tables      = {}
+        self._tables_lock = threading.Lock()
+
+    def columns(self, layout):
+        columns = list(self.HEADER_COLUMNS)
+
+        for field in layout.fieldName:
+            columns.append((field + '.raw', '<i4'))
+            columns.append((field, '<f8'))
+
+        return columns
+
+    def convert(self, fox, layout_name, output_dir):
+        layout  = fox.getLayoutByName(getattr(Spacecraft, "{}_LAYOUT".format(layout_name)))
+        columns = self.columns(layout)
+
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+
+        work    = Queue.Queue(maxsize=self.workers * 2)
+        results = Queue.Queue(maxsize=self.workers * 2)
+        errors  = []
+
+        reader = threading.Thread(target=self.read_chunks, args=(self.migrator.get_serverlog_filename(fox, layout_name), work, errors))
+        reader.setDaemon(True)
+        reader.start()
+
+        decoders = [threading.Thread(target=self.decode_chunks, args=(fox, layout, layout_name, work, results, errors)) for i in range(self.workers)]
+        for decoder in decoders:
+            decoder.setDaemon(True)
+            decoder.start()
+
+        outputs = dict((name, open(os.path.join(output_dir, name + '.bin'), 'wb')) for name, dtype in columns)
+
+        rows, skipped, pending, next_seq, finished = 0, 0, {}, 0, 0
+
+        try:
+            while finished < self.workers:
+                item = results.get()
+
+                if item is None:
+                    finished += 1
+                    continue
+
+                pending[item[0]] = item
+
+                # Write chunks in file order as soon as the next one is ready
+                while next_seq in pending:
+                    seq, chunk, chunk_skipped = pending.pop(next_seq)
+
+                    for name, dtype in columns:
+                        values = chunk[name]
+                        outputs[name].write(struct.pack("<{}{}".format(len(values), self.STRUCT_CODES[dtype]), *values))
+
+                    rows    += len(chunk['id'])
+                    skipped += chunk_skipped
+                    next_seq += 1
+        finally:
+            for fp in outputs.values():
+                fp.close()
+
+        if errors:
+            raise errors[0]
+
+        schema = {
+            'spacecraft': fox.foxId,
+            'layout':     layout_name,
+            'rows':       rows,
+            'skipped':    skipped,
+            'columns':    [{'name': name, 'dtype': dtype, 'file': name + '.bin'} for name, dtype in columns]
+        }
+
+        with open(os.path.join(output_dir, 'schema.json'), 'w') as fp:
+            json.dump(schema, fp, indent=2)
+
+        return schema
+
+    def read_chunks(self, filename, work, errors):
+        seq = 0
+
+        try:
+            with open(filename, 'r') as fp:
+                chunk = []
+
+                for row in csv.reader(fp):
+                    chunk.append(row)
+
+                    if len(chunk) >= self.chunk_rows:
+                        work.put((seq, chunk))
+                        seq, chunk = seq + 1, []
+
+                if chunk:
+                    work.put((seq, chunk))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for i in range(self.workers):
+                work.put(None)
+
+    def decode_chunks(self, fox, layout, layout_name, work, results, errors):
+        try:
+            while True:
+                item = work.get()
+
+                if item is None:
+                    break
+
+                seq, rows = item
+                chunk, skipped = self.decode_chunk(fox, layout, layout_name, rows)
+                results.put((seq, chunk, skipped))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            results.put(None)
+
+    def conversion_table(self, fox, layout, layout_name):
+        key = (fox.foxId, layout_name)
+
+        with self._tables_lock:
+            if key not in self._tables:
+                self._tables[key] = LayoutConversionTable(fox, layout, self.migrator.get_payload_object(layout_name, layout))
+
+            return self._tables[key]
+
+    def decode_chunk(self, fox, layout, layout_name, rows):
+        table   = self.conversion_table(fox, layout, layout_name)
+        width   = 5 + len(table.fields)
+        total   = len(rows)
+        rows    = [row for row in rows if len(row) >= width]
+        skipped = total - len(rows)
+
+        chunk = {
+            'captureDate': [calendar.timegm(time.strptime(row[0], "%Y%m%d%H%M%S")) * 1000 for row in rows],
+            'id':          [int(row[1]) for row in rows],
+            'resets':      [int(row[2]) for row in rows],
+            'uptime':      [int(row[3]) for row in rows],
+            'type':        [int(row[4]) for row in rows],
+        }
+
+        # Convert column at a time through the per-layout lookup tables
+        for i, field in enumerate(table.fields):
+            raws = [int(row[5 + i]) for row in rows]
+
+            chunk[field + '.raw'] = raws
+            chunk[field] = table.convert_column(i, raws)
+
+        return chunk, skipped
+
+"""
+Raw to engineering unit conversion for one spacecraft/layout pair, built
+once and shared by every decoder thread.
+
+Field order and conversion ids are resolved from the BitArrayLayout up
+front, and each field gets a raw -> value lookup table: fields of at most
+EAGER_BITS bits are tabulated over their whole raw range immediately, wider
+ones are memoized as values are seen.  Converting a column is then one
+dictionary lookup per value.
+"""
+class LayoutConversionTable:
+
+    EAGER_BITS = 12
+
+    def __init__(self, fox, layout, payload):
+        self.fox         = fox
+        self.payload     = payload
+        self.fields      = list(layout.fieldName)
+        self.index       = dict((field, i) for i, field in enumerate(self.fields))
+        self.conversions = [layout.getConversionByName(field) for field in self.fields]
+        self.bits        = list(layout.fieldBitLength)
+        self.tables      = [{} for field in self.fields]
+        self._lock       = threading.Lock()
+
+        for i in range(len(self.fields)):
+            if 0 < self.bits[i] <= self.EAGER_BITS:
+                table = self.tables[i]
+
+                for raw in range(1 << self.bits[i]):
+                    table[raw] = self.convert(i, raw)
+
+    def convert(self, i, raw):
+        # FramePart.convertRawValue only reads its arguments, so one payload serves every thread
+        return self.payload.convertRawValue(self.fields[i], raw, self.conversions[i], self.fox)
+
+    def convert_column(self, i, raws):
+        table  = self.tables[i]
+        values = []
+
+        for raw in raws:
+            value = table.get(raw)
+
+            if value is None:
+                value = self.convert(i, raw)
+
+                with self._lock:
+                    table[raw] = value
+
+            values.append(value)
+
+        return values
+
+if __name__ == "__main__":
+    ap = ArgumentParser()
+
+    ap.add_argument('--jar-path')
+    ap.add_argument('--start-service', action="store_true")
+    ap.add_argument('-e', '--event')
+    ap.add_argument('--java-stdout', action="store_true") # Turn on Java System Stdout for Debugging
+    ap.add_argument('--workers', type=int, default=1, help="Threads handling requests concurrently in service mode")
+    ap.add_argument('--convert-serverlog', metavar="SPACECRAFT", help="Convert a serverlog to columnar files (Spacecraft keps name, ie. FOX1D)")
+    ap.add_argument('-l', '--layout', default="REAL_TIME", help="REAL_TIME, MIN or MAX")
+    ap.add_argument('-o', '--output', help="Columnar output directory")
     ap.add_argument('--data-path')
-    """
+    ap.add_argument('--chunk-rows', type=int, default=10000)
+    ap.add_argument('--eager-init', action="store_true", help="Start every FoxTelem subsystem at launch instead of on first use")
 
     args = ap.parse_args()
 
-    if args.command == "write-config":
-        FoxTelemConfigWriter().write(args.output)
+    if args.convert_serverlog is not None:
+        mig = AmsatTelemetryDataMigrator(data_dir=args.data_path)
+        fox = mig.load_spacecraft(args.convert_serverlog)
 
-    """
-    mig = AmsatTelemetryDataMigrator(data_dir=args.data_path)
+        converter = ServerlogColumnarConverter(mig, chunk_rows=args.chunk_rows, workers=args.workers)
+        schema = converter.convert(fox, args.layout, args.output)
 
-    fox = mig.load_spacecraft(args.spacecraft)
+        print("Wrote {} rows ({} skipped) to {}".format(schema['rows'], schema['skipped'], args.output))
+        exit()
+
+    bridge = FoxTelemJythonBridge(jar_path=args.jar_path, enable_java_stdout=args.java_stdout)
+
+    if args.eager_init:
+        bridge.init_all()
+
+    if args.start_service:
+        bridge.start(workers=args.workers)
+    elif args.event is not None:
+        bridge.emit(bridge.handle_event(json.loads(args.event)))
+    else:
+        print("Nothing to do...")
 
-    mig.process_serverlog_to_csv(fox, args.layout, args.output)
-    """
@@ -10,18 +10,19 @@ setup(
     url = 'https://github.com/RogerWebb/AmsatApiClientPython',
     download_url = 'https://github.com/RogerWebb/AmsatApiPython/archive/v_02.tar.gz',
     keywords = ['AMSAT', 'SATELLITE', 'STATUS', 'PASSES'],
+    python_requires='>=3.7',
     install_requires=[
         'requests'
     ],
+    extras_require={
+        'predict': ['numpy', 'sgp4'],
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Build Tools',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
     ],